@@ -0,0 +1,201 @@
+# Benchmark.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides reproducible benchmarks of the hot paths (parsing,
+# scaling, training and prediction). A synthetic capture with valid lines is
+# generated, every benchmark is repeated and reported with throughput, latency
+# percentiles and peak memory. The results are saved as json and can be
+# compared against the results of an earlier run (baseline).
+#
+# Usage: python -m src.Benchmark --lines 100000 --output bench.json --baseline old.json
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from src.MachineLearning import NeuralNetwork
+from src.Optimizer import SGD
+from src.Parser import Parser
+from src.Quantization import exportQuantized, QuantizedPredictor
+
+LINE_LENGTH = 240   # the Parser accepts lines with 230 - 250 characters
+
+# Writes a capture with the given amount of step lines (and some noise lines)
+def generateCapture(path, lines, seed=0, noiseRatio=0.01):
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(-2.0, 2.0, (lines, 9))
+    labels = rng.choice(["noMove", "slowWalk", "labelPlaceholder"], lines)
+    isNoise = rng.random(lines) < noiseRatio
+
+    with open(path, "w") as file:
+        for i in range(lines):
+            accelerations = []
+            for j in range(0, 9, 3):
+                accelerations.append("\"Acceleration\":{\"x-Axes\":%.5f,\"y-Axes\":%.5f,\"z-Axes\":%.5f"
+                    % tuple(values[i, j:j + 3]))
+            label = "noise" if isNoise[i] else labels[i]
+            line = "[{\"Label\":" + label + "," + "},".join(accelerations) + ",}}]"
+            file.write(line.ljust(LINE_LENGTH - 1) + "\n")     # spaces are removed by the Parser
+
+# Runs function once to trace its peak memory and then repeat times to
+# measure its run time
+def measure(function, repeat):
+    tracemalloc.start()
+    try:
+        function()
+        peakMemory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return (np.array(timings), peakMemory)
+
+# Like measure, but times every call function(item) on its own, so the
+# percentiles are latencies of single items instead of whole runs
+def measurePerItem(function, items, repeat):
+    tracemalloc.start()
+    try:
+        for item in items:
+            function(item)
+        peakMemory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    latencies = np.empty(repeat * len(items))
+    for i in range(repeat):
+        start = time.perf_counter()
+        for (j, item) in enumerate(items):
+            itemStart = time.perf_counter()
+            function(item)
+            latencies[i * len(items) + j] = time.perf_counter() - itemStart
+        timings.append(time.perf_counter() - start)
+
+    return (np.array(timings), peakMemory, latencies)
+
+# latencies: per item latencies (see measurePerItem), otherwise the
+# percentiles are computed over the run times
+def summarize(timings, peakMemory, items, unit, latencies=None):
+    if latencies is None:
+        latencies = timings
+
+    return {"items": items, "unit": unit,
+        "throughput": items / float(np.median(timings)),
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p90": float(np.percentile(latencies, 90)),
+        "latency_p99": float(np.percentile(latencies, 99)),
+        "peak_memory": int(peakMemory)}
+
+def runBenchmarks(lines=100000, repeat=5, seed=0, singlePredictions=2000):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "capture.txt")
+        generateCapture(path, lines, seed)
+        megabytes = os.path.getsize(path) / 1e6
+
+        parser = Parser()
+        parser.setDestination(path)
+        (timings, peakMemory) = measure(parser.processData, repeat)
+        results["parse_processData"] = summarize(timings, peakMemory, megabytes, "MB")
+        (timings, peakMemory) = measure(parser.processDataBatch, repeat)
+        results["parse_processDataBatch"] = summarize(timings, peakMemory, megabytes, "MB")
+
+    np.random.seed(seed)
+    neuralNetwork = NeuralNetwork()
+    batch = parser.getDataBatch()
+    (timings, peakMemory) = measure(lambda: neuralNetwork.setInputForClassificationScaled(batch), repeat)
+    results["scale_batch"] = summarize(timings, peakMemory, len(batch), "rows")
+    dataArray = parser.getDataArray()
+    (timings, peakMemory) = measure(lambda: neuralNetwork.setInputForClassificationScaled(dataArray), repeat)
+    results["scale_list"] = summarize(timings, peakMemory, len(dataArray), "rows")
+
+    (X, y) = neuralNetwork.setInputForClassificationScaled(batch)
+    (timings, peakMemory) = measure(lambda: neuralNetwork.train(X, y), repeat)
+    results["train_fullBatch"] = summarize(timings, peakMemory, len(X), "rows")
+    (timings, peakMemory) = measure(lambda: neuralNetwork.fit(X, y, SGD(), batchSize=64, maxEpochs=1), repeat)
+    results["train_epoch"] = summarize(timings, peakMemory, len(X), "rows")
+
+    rows = X[:singlePredictions]
+    (timings, peakMemory, latencies) = measurePerItem(neuralNetwork.predictWithoutPrint, rows, repeat)
+    results["predict_perRow"] = summarize(timings, peakMemory, len(rows), "rows", latencies)
+    (timings, peakMemory) = measure(lambda: neuralNetwork.predictBatch(X), repeat)
+    results["predict_batch"] = summarize(timings, peakMemory, len(X), "rows")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "model.nn")
+        exportQuantized(neuralNetwork, path, "int8", X[:10000])
+        for (name, useLookupTable) in (("predict_int8", False), ("predict_int8_lookupTable", True)):
+            predictor = QuantizedPredictor(useLookupTable).load(path, mmap=False)
+            (timings, peakMemory) = measure(lambda: predictor.predictBatch(X), repeat)
+            results[name] = summarize(timings, peakMemory, len(X), "rows")
+
+    return {"meta": {"lines": lines, "repeat": repeat, "seed": seed, "python": platform.python_version(),
+        "numpy": np.__version__, "machine": platform.machine(), "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "results": results}
+
+# Returns the benchmarks whose throughput dropped by more than threshold
+def compareResults(results, baseline, threshold=0.1):
+    regressions = {}
+    for (name, result) in results["results"].items():
+        if name in baseline["results"]:
+            ratio = result["throughput"] / baseline["results"][name]["throughput"]
+            if ratio < 1 - threshold:
+                regressions[name] = ratio
+
+    return regressions
+
+def printResults(results, baseline=None):
+    print("%-24s %14s %10s %10s %10s %12s %9s" % ("benchmark", "throughput", "p50 [ms]", "p90 [ms]", "p99 [ms]", "peak [MB]", "vs. base"))
+    for (name, result) in results["results"].items():
+        comparison = ""
+        if baseline is not None and name in baseline["results"]:
+            comparison = "%.2fx" % (result["throughput"] / baseline["results"][name]["throughput"])
+        print("%-24s %10.1f %-3s %10.4f %10.4f %10.4f %12.2f %9s" % (name, result["throughput"], result["unit"] + "/s",
+            1000 * result["latency_p50"], 1000 * result["latency_p90"], 1000 * result["latency_p99"],
+            result["peak_memory"] / 1e6, comparison))
+
+def main(argv=None):
+    argumentParser = argparse.ArgumentParser(description="Benchmarks of the parse, train and predict hot paths.")
+    argumentParser.add_argument("--lines", type=int, default=100000, help="lines of the synthetic capture")
+    argumentParser.add_argument("--repeat", type=int, default=5, help="repetitions of every benchmark")
+    argumentParser.add_argument("--seed", type=int, default=0)
+    argumentParser.add_argument("--output", help="json file to save the results in")
+    argumentParser.add_argument("--baseline", help="json file of an earlier run to compare against")
+    argumentParser.add_argument("--threshold", type=float, default=0.1,
+        help="max. allowed throughput drop compared to the baseline (0.1 = 10%%)")
+    arguments = argumentParser.parse_args(argv)
+
+    results = runBenchmarks(arguments.lines, arguments.repeat, arguments.seed)
+    baseline = None
+    if arguments.baseline is not None:
+        with open(arguments.baseline, "r") as file:
+            baseline = json.load(file)
+
+    printResults(results, baseline)
+    if arguments.output is not None:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if baseline is not None:
+        regressions = compareResults(results, baseline, arguments.threshold)
+        for (name, ratio) in regressions.items():
+            print("Regression: " + name + " reached only " + str(round(100 * ratio, 1)) + "% of the baseline throughput.")
+        if len(regressions) > 0:
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
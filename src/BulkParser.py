@@ -0,0 +1,182 @@
+# BulkParser.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides a parser for many (and large) input files at once. The
+# files are split into byte ranges, which are parsed in parallel by a pool of
+# worker processes with the normal Parser logic and merged into one StepBatch
+
+import functools
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.Metrics import metrics
+from src.Parser import Parser, ParseError, ParseErrors, createLineCounts, recordLineCounts
+from src.StepBatch import StepBatch
+from src.Calibration import NoiseCalibration, CalibrationProfiles
+
+class BulkParser(object):
+    def __init__(self, maxWorkers=None, chunkSize=64 * 1024 * 1024, applyCalibration=False, strict=True):
+        # parameters
+        self.maxWorkers = maxWorkers            # None: one worker per core
+        self.chunkSize = chunkSize              # max. amount of bytes parsed by one worker task
+        self.sources = []
+        self.batch = StepBatch()
+        self.lineCtr = 1
+        self.average = [0.0, 0.0, 0.0]
+        self.calibration = NoiseCalibration()       # noise of all files
+        self.profiles = CalibrationProfiles()       # noise of every file (one file per device)
+        self.applyCalibration = applyCalibration   # subtract the noise mean of every file from its data
+        self.strict = strict                        # see Parser
+        self.errors = ParseErrors()
+        self.lineCounts = createLineCounts()       # see Parser, summed over all chunks
+
+    def setSources(self, sources):
+        # sources can be a directory, a glob pattern, a single file or a list of them
+        if isinstance(sources, (str, os.PathLike)):
+            sources = [sources]
+
+        self.sources = []
+        for source in sources:
+            source = os.fspath(source)
+            if os.path.isdir(source):
+                paths = [os.path.join(source, name) for name in sorted(os.listdir(source))]
+                self.sources.extend(path for path in paths if os.path.isfile(path))
+            elif os.path.isfile(source):
+                self.sources.append(source)
+            else:
+                self.sources.extend(sorted(glob.glob(source)))
+
+        if len(self.sources) == 0:
+            raise ValueError("No input files were found for the given sources: " + str(sources))
+
+    def splitSources(self):
+        # split every file into byte ranges of at most chunkSize bytes
+        chunks = []
+        for path in self.sources:
+            size = os.path.getsize(path)
+            for start in range(0, max(size, 1), self.chunkSize):
+                chunks.append((path, start, min(start + self.chunkSize, size)))
+
+        return chunks
+
+    def processData(self):
+        chunks = self.splitSources()
+        parse = functools.partial(parseChunk, strict=self.strict)
+        start = time.perf_counter()
+
+        if self.maxWorkers == 1 or len(chunks) == 1:
+            results = [parse(*chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.maxWorkers) as executor:
+                results = list(executor.map(parse, *zip(*chunks)))
+
+        self.mergeResults(results, [path for (path, start, end) in chunks])
+
+        # the workers have their own metrics registries, so the counts are
+        # returned by parseChunk and recorded here
+        recordLineCounts(self.lineCounts)
+        if metrics.enabled:
+            metrics.increment("parser_seconds_total", time.perf_counter() - start)
+            metrics.increment("parser_bytes_total", sum(os.path.getsize(path) for path in self.sources))
+
+    def mergeResults(self, results, paths):
+        # concatenate the data of all chunks in input order and merge the
+        # noise accumulators and the errors of the single parsers
+        self.batch = StepBatch(sum(len(result[1]) for result in results))
+        self.lineCtr = 1
+        self.average = [0.0, 0.0, 0.0]
+        self.calibration = NoiseCalibration()
+        self.profiles = CalibrationProfiles()
+        self.errors = ParseErrors()
+        self.lineCounts = createLineCounts()
+        lineOffsets = {}    # path --> lines read in the previous chunks of the file
+        chunkRows = []      # (path, first row, end row) of every chunk in the batch
+
+        for ((values, labels, average, calibration, lineCount, errors, readLineCount, lineCounts), path) in zip(
+                results, paths):
+            self.errors.merge(errors, lineOffsets.get(path, 0), path if len(self.sources) > 1 else None)
+            lineOffsets[path] = lineOffsets.get(path, 0) + readLineCount
+
+            chunkBatch = StepBatch(0)
+            chunkBatch.setArrays(values, labels)
+            chunkRows.append((path, len(self.batch), len(self.batch) + len(labels)))
+            self.batch.extend(chunkBatch)
+
+            self.lineCtr += lineCount
+            for i in range(len(self.average)):
+                self.average[i] += average[i]
+            self.calibration.merge(calibration)
+            for (name, count) in lineCounts.items():
+                self.lineCounts[name] += count
+            self.profiles.getProfile(path).merge(calibration)
+
+        if self.applyCalibration:
+            # every file is calibrated with the noise of its own device
+            values = self.batch.getInput()
+            for (path, start, end) in chunkRows:
+                profile = self.profiles.getProfile(path)
+                if profile.isCalibrated():
+                    profile.apply(values[start:end], out=values[start:end])
+
+    # getter
+    def getDataBatch(self):
+        return self.batch
+
+    def getAverage(self):
+        return self.average
+
+    def getCalibration(self):
+        return self.calibration
+
+    def getProfiles(self):
+        return self.profiles
+
+    def getErrors(self):
+        return self.errors
+
+    def getLineCounts(self):
+        return self.lineCounts
+
+    def getSources(self):
+        return self.sources
+
+# Runs in the worker processes: parses all lines starting in [start, end)
+def parseChunk(path, start, end, strict=True):
+    parser = Parser(strict)
+    parser.setDestination(path)
+    parser.recordMetrics = False    # returned instead (see BulkParser.processData)
+    try:
+        parser.processDataArrayBatch(readLines(path, start, end))
+    except ParseError as error:
+        # the line numbers of the parser start at the beginning of the chunk
+        location = path if start == 0 else (path + " (chunk starting at byte " + str(start)
+            + ", lines counted from there)")
+        raise ParseError(error.reason, location + ": " + str(error)) from error
+    batch = parser.getDataBatch()
+    batch.trim()
+
+    return (batch.getInput(), batch.getLabels(), parser.getAverage(), parser.getCalibration(), parser.lineCtr - 1,
+        parser.getErrors(), parser.readLineCtr, parser.getLineCounts())
+
+# Yields the decoded lines which start inside the byte range [start, end)
+def readLines(path, start, end):
+    with open(path, "rb") as file:
+        position = start
+        if start > 0:
+            # the line crossing the range start belongs to the previous range
+            file.seek(start - 1)
+            position += len(file.readline()) - 1
+
+        while position < end:
+            line = file.readline()
+            if len(line) == 0:
+                break
+
+            position += len(line)
+            if line.endswith(b"\r\n"):
+                line = line[:-2] + b"\n"    # same line endings as in text mode
+
+            yield line.decode("utf-8", "replace")
@@ -0,0 +1,97 @@
+# Calibration.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides the noise calibration of the sensors. The mean and the
+# variance of every axis are accumulated over the noise samples with Welford's
+# (resp. Chan's) algorithm, so the accumulators can be updated line by line,
+# merged across parallel parsers and stored per device
+
+import json
+import numpy as np
+
+class NoiseCalibration(object):
+    def __init__(self, axes=3):
+        # parameters
+        self.count = 0
+        self.mean = np.zeros(axes)
+        self.m2 = np.zeros(axes)    # sum of the squared deviations from the mean
+
+    def update(self, values):
+        # values: one or more samples with one value per axis (e.g. the 9 values
+        # of a noise line = 3 samples with x, y and z)
+        values = np.asarray(values, dtype=float).reshape(-1, len(self.mean))
+        if len(values) == 0:
+            return self
+
+        mean = np.mean(values, axis=0)
+        self.combine(len(values), mean, np.sum(np.square(values - mean), axis=0))
+
+        return self
+
+    def merge(self, other):
+        # adds the samples of another accumulator (e.g. of a parallel parser)
+        if other.count > 0:
+            self.combine(other.count, other.mean, other.m2)
+
+        return self
+
+    def combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + np.square(delta) * (self.count * count / total)
+        self.count = total
+
+    def apply(self, X, out=None):
+        # subtracts the mean of every axis from data with the layout x, y, z, x, y, z, ...
+        X = np.asarray(X)
+        offset = np.tile(self.mean, X.shape[-1] // len(self.mean)).astype(X.dtype if X.dtype.kind == "f" else float)
+        return np.subtract(X, offset, out=out)
+
+    def isCalibrated(self):
+        return self.count > 0
+
+    # getter
+    def getMean(self):
+        return self.mean
+
+    def getVariance(self):
+        return self.m2 / self.count if self.count > 1 else np.zeros_like(self.m2)
+
+    def getState(self):
+        return {"count": self.count, "mean": self.mean.tolist(), "m2": self.m2.tolist()}
+
+    # setter
+    def setState(self, state):
+        self.count = state["count"]
+        self.mean = np.array(state["mean"], dtype=float)
+        self.m2 = np.array(state["m2"], dtype=float)
+
+class CalibrationProfiles(object):
+    def __init__(self):
+        # parameters
+        self.profiles = {}  # device id --> NoiseCalibration
+
+    def getProfile(self, deviceId):
+        if deviceId not in self.profiles:
+            self.profiles[deviceId] = NoiseCalibration()
+        return self.profiles[deviceId]
+
+    def merge(self, other):
+        for (deviceId, calibration) in other.profiles.items():
+            self.getProfile(deviceId).merge(calibration)
+
+        return self
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump({deviceId: calibration.getState() for (deviceId, calibration) in self.profiles.items()}, file)
+
+    def load(self, path):
+        with open(path, "r") as file:
+            for (deviceId, state) in json.load(file).items():
+                self.getProfile(deviceId).setState(state)
+
+        return self
@@ -0,0 +1,124 @@
+# Checkpointer.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides periodic checkpoints of a running training. A checkpoint
+# is a model file (see ModelFile.py), which additionally contains the state
+# of the training loop, of the optimizer and of the random number generator,
+# so NeuralNetwork.fit can resume exactly where it was interrupted. Every
+# checkpoint replaces the previous one atomically.
+
+import os
+import time
+import numpy as np
+from src.ModelFile import writeModelFile, readModelFile
+
+# Raised if a checkpoint belongs to a training on other data; such a training
+# can't be resumed, a new one has to be started
+class CheckpointMismatchError(ValueError):
+    pass
+
+class Checkpointer(object):
+    def __init__(self, path="checkpoint.nn", interval=10, seconds=None):
+        # parameters
+        self.path = path
+        self.interval = interval    # epochs between two checkpoints
+        self.seconds = seconds      # additionally save if the last checkpoint is older (in s)
+        self.lastSave = time.monotonic()
+
+    def shouldSave(self, epoch):
+        if self.interval is not None and (epoch + 1) % self.interval == 0:
+            return True
+        return self.seconds is not None and time.monotonic() - self.lastSave >= self.seconds
+
+    def save(self, neuralNetwork, optimizer, state):
+        # state: epoch (the next one), history, bestLoss, bestParameters,
+        # epochsWithoutImprovement and finished of NeuralNetwork.fit
+        (header, arrays) = neuralNetwork.getModelData()
+        for (i, parameter) in enumerate(state["bestParameters"]):
+            arrays["best" + str(i)] = parameter
+
+        # lists of arrays in the optimizer state are stored as single arrays
+        optimizerState = {}
+        optimizerLists = {}     # name --> length of the list
+        for (name, value) in optimizer.getState().items():
+            if isinstance(value, list):
+                optimizerLists[name] = len(value)
+                for (i, array) in enumerate(value):
+                    arrays["optimizer." + name + str(i)] = array
+            else:
+                optimizerState[name] = value
+
+        (generator, keys, position, hasGauss, cachedGaussian) = np.random.get_state()
+        arrays["randomKeys"] = keys
+
+        header["checkpoint"] = {"epoch": state["epoch"], "history": state["history"], "bestLoss": state["bestLoss"],
+            "epochsWithoutImprovement": state["epochsWithoutImprovement"], "finished": state["finished"],
+            "bestParameters": len(state["bestParameters"]), "optimizer": optimizerState,
+            "optimizerLists": optimizerLists, "optimizerType": type(optimizer).__name__,
+            "random": {"generator": generator, "position": position, "hasGauss": hasGauss,
+                "cachedGaussian": cachedGaussian}}
+
+        writeModelFile(self.path, header, arrays)
+        self.lastSave = time.monotonic()
+
+    def load(self, neuralNetwork, optimizer):
+        # Restores the weights (in place, so shared weights stay shared), the
+        # optimizer and the random number generator. Returns the state of
+        # fit or None if there is no checkpoint yet.
+        try:
+            (header, arrays) = readModelFile(self.path, mmap=False)
+        except FileNotFoundError:
+            return None
+
+        checkpoint = header.pop("checkpoint", None)
+        if checkpoint is None:
+            raise ValueError("The file \"" + str(self.path) + "\" is a model file, but no checkpoint.")
+        if checkpoint["optimizerType"] != type(optimizer).__name__:
+            raise ValueError("The checkpoint \"" + str(self.path) + "\" was written with the optimizer "
+                + checkpoint["optimizerType"] + ", not with " + type(optimizer).__name__ + ".")
+
+        currentHeader = neuralNetwork.getModelData()[0]
+        if header["layerSizes"] != currentHeader["layerSizes"] or header["useBias"] != currentHeader["useBias"]:
+            raise ValueError("The checkpoint \"" + str(self.path) + "\" belongs to a network with the layer sizes "
+                + str(header["layerSizes"]) + ", not " + str(currentHeader["layerSizes"]) + ".")
+
+        # the input of the running training was scaled with the scaler fitted on
+        # its data: a checkpoint of a training on other data isn't resumed
+        scaler = neuralNetwork.scaler
+        if scaler.isFitted():
+            if (header["scalerSamples"] != scaler.sampleCtr
+                    or not np.allclose(arrays["scalerMaxAbs"], scaler.getMaxAbs())):
+                raise CheckpointMismatchError("The checkpoint \"" + str(self.path) + "\" belongs to a training on other data ("
+                    + str(header["scalerSamples"]) + " instead of " + str(scaler.sampleCtr) + " samples or other "
+                    + "scaling). Remove it to start a new training.")
+        else:
+            scaler.setMaxAbs(arrays["scalerMaxAbs"], header["scalerSamples"])
+
+        # same order as NeuralNetwork.getParameters()
+        names = []
+        for i in range(len(neuralNetwork.layers)):
+            names.append("W" + str(i + 1))
+            if header["useBias"]:
+                names.append("b" + str(i + 1))
+        for (name, parameter) in zip(names, neuralNetwork.getParameters()):
+            parameter[...] = arrays[name]
+
+        optimizerState = dict(checkpoint["optimizer"])
+        for (name, length) in checkpoint["optimizerLists"].items():
+            optimizerState[name] = [arrays["optimizer." + name + str(i)] for i in range(length)]
+        optimizer.setState(optimizerState)
+
+        random = checkpoint["random"]
+        np.random.set_state((random["generator"], arrays["randomKeys"], random["position"], random["hasGauss"],
+            random["cachedGaussian"]))
+
+        return {"epoch": checkpoint["epoch"], "history": checkpoint["history"], "bestLoss": checkpoint["bestLoss"],
+            "bestParameters": [arrays["best" + str(i)] for i in range(checkpoint["bestParameters"])],
+            "epochsWithoutImprovement": checkpoint["epochsWithoutImprovement"], "finished": checkpoint["finished"]}
+
+    def remove(self):
+        # e.g. after the final model was saved
+        if os.path.exists(self.path):
+            os.remove(self.path)
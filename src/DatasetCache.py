@@ -0,0 +1,116 @@
+# DatasetCache.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides an on-disk cache for parsed input files. After the first
+# parse the StepBatch arrays are stored as .npy files, which are keyed by path,
+# size and modification time of the source file and memory-mapped on reload
+
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+from src.StepBatch import StepBatch
+from src.Calibration import NoiseCalibration
+
+CACHE_VERSION = 3
+
+class DatasetCache(object):
+    def __init__(self, cacheDirectory=".datasetCache"):
+        # parameters
+        self.cacheDirectory = cacheDirectory
+
+    def processData(self, parser):
+        # loads the data of parser.destination from the cache or parses it and
+        # fills the cache. Afterwards the parser holds the batch, the average and
+        # the noise calibration.
+        if not self.load(parser):
+            parser.processDataBatch()
+            self.store(parser)
+
+    def rebuild(self, parser):
+        self.invalidate(parser.destination)
+        parser.processDataBatch()
+        self.store(parser)
+
+    def invalidate(self, sourcePath=None):
+        # deletes all cache entries of the given source file (or all entries)
+        if sourcePath is None:
+            pattern = "*"
+        else:
+            pattern = self.getSourcePrefix(sourcePath) + "-*"
+
+        for path in glob.glob(os.path.join(self.cacheDirectory, pattern)):
+            os.remove(path)
+
+    def load(self, parser):
+        entryPath = self.getEntryPath(parser.destination)
+        try:
+            with open(entryPath + ".json", "r") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        if meta.get("version") != CACHE_VERSION or meta["calibrated"] != parser.applyCalibration:
+            return False
+        if parser.strict and any(reason != "length" for reason in meta["errors"]["counts"]):
+            return False    # entry of a lenient parse, a strict parse has to raise the error
+        if parser.keepCalibration and parser.applyCalibration:
+            return False    # the data has to be calibrated with the profile of the parser
+
+        batch = StepBatch(0)
+        batch.setArrays(np.load(entryPath + "-values.npy", mmap_mode="r"),
+            np.load(entryPath + "-labels.npy", mmap_mode="r"))
+
+        parser.batch = batch
+        calibration = NoiseCalibration()
+        calibration.setState(meta["calibration"])
+        if parser.keepCalibration:
+            # a profile (see Parser.setCalibration) gets the noise of the file added
+            parser.average = [total + value for (total, value) in zip(parser.average, meta["average"])]
+            parser.calibration.merge(calibration)
+        else:
+            parser.average = meta["average"]
+            parser.calibration = calibration
+        parser.lineCtr = meta["lineCtr"]
+        parser.errors.setState(meta["errors"])
+        parser.readLineCtr = meta["readLineCtr"]
+
+        return True
+
+    def store(self, parser):
+        if parser.keepCalibration:
+            return          # the profile contains the noise of other data, too
+
+        # stale entries of an older version of the file are replaced
+        self.invalidate(parser.destination)
+        os.makedirs(self.cacheDirectory, exist_ok=True)
+
+        entryPath = self.getEntryPath(parser.destination)
+        batch = parser.getDataBatch()
+        self.writeAtomic(entryPath + "-values.npy", lambda file: np.save(file, batch.getInput()))
+        self.writeAtomic(entryPath + "-labels.npy", lambda file: np.save(file, batch.getLabels()))
+
+        # the meta file is written last, it marks the entry as complete
+        meta = {"version": CACHE_VERSION, "source": os.path.abspath(parser.destination),
+            "average": list(parser.getAverage()), "lineCtr": parser.lineCtr,
+            "calibration": parser.getCalibration().getState(), "calibrated": parser.applyCalibration,
+            "errors": parser.getErrors().getState(), "readLineCtr": parser.readLineCtr}
+        self.writeAtomic(entryPath + ".json", lambda file: file.write(json.dumps(meta).encode("utf-8")))
+
+    def writeAtomic(self, path, write):
+        temporaryPath = path + ".tmp"
+        with open(temporaryPath, "wb") as file:
+            write(file)
+        os.replace(temporaryPath, path)
+
+    def getSourcePrefix(self, sourcePath):
+        return hashlib.sha1(os.path.abspath(sourcePath).encode("utf-8")).hexdigest()[:16]
+
+    def getEntryPath(self, sourcePath):
+        # the key changes as soon as the source file is modified
+        status = os.stat(sourcePath)
+        key = hashlib.sha1((str(status.st_size) + ":" + str(status.st_mtime_ns)).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cacheDirectory, self.getSourcePrefix(sourcePath) + "-" + key)
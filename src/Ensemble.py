@@ -0,0 +1,220 @@
+# Ensemble.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides an ensemble of independently seeded neural networks of
+# the same architecture. The members are trained concurrently in worker
+# processes (the dataset is shared with them, see SharedArrays.py) and
+# predicted together in one forward pass: the first weight matrices are
+# concatenated and the later ones are combined block-diagonally, so every
+# member only sees its own hidden units. The outputs are averaged.
+
+import copy
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.MachineLearning import NeuralNetwork
+from src.Checkpointer import Checkpointer
+from src.Layers import activate
+from src.ModelFile import writeModelFile, readModelFile
+from src.Scaler import FeatureScaler
+from src.SharedArrays import shareArray, attachSharedArray, releaseSharedArray
+from src.ParallelTrainer import limitedThreads
+
+class Ensemble(object):
+    def __init__(self, members=None, scaler=None):
+        # parameters
+        self.members = []
+        self.scaler = FeatureScaler() if scaler is None else scaler    # scaling of the input of all members
+        self.output = "sigmoid"
+        self.outputSize = 1
+        self.weights = []       # combined weight matrices and biases of all members
+        self.biases = []
+        self.activations = []
+
+        if members is not None:
+            self.setMembers(members)
+
+    # Trains size networks with the arguments config (see NeuralNetwork) in
+    # maxWorkers processes. X must already be scaled with self.scaler. With a
+    # checkpointDirectory every member keeps its own checkpoint there, so an
+    # interrupted ensemble training continues where it stopped. Returns the
+    # loss histories of the members.
+    def fit(self, X, y, size=5, config=None, optimizer=None, seeds=None, maxWorkers=None, threadsPerWorker=1,
+            checkpointDirectory=None, checkpointInterval=10, **fitArguments):
+        config = {} if config is None else dict(config)
+        if seeds is None:
+            seeds = np.random.randint(2 ** 31, size=size).tolist()
+        if checkpointDirectory is not None:
+            os.makedirs(checkpointDirectory, exist_ok=True)
+
+        tasks = []
+        for (i, seed) in enumerate(seeds):
+            checkpointPath = None
+            if checkpointDirectory is not None:
+                checkpointPath = getMemberCheckpointPath(checkpointDirectory, i)
+            tasks.append((config, seed, copy.deepcopy(optimizer), checkpointPath, checkpointInterval, fitArguments))
+
+        blocks = []
+        try:
+            (block, sharedX, descriptorX) = shareArray(X)
+            blocks.append(block)
+            (block, sharedY, descriptorY) = shareArray(y)
+            blocks.append(block)
+
+            if maxWorkers == 1 or len(tasks) == 1:
+                results = [trainMember(descriptorX, descriptorY, *task) for task in tasks]
+            else:
+                context = multiprocessing.get_context("spawn")
+                with limitedThreads(threadsPerWorker):
+                    with ProcessPoolExecutor(max_workers=maxWorkers or os.cpu_count(), mp_context=context) as executor:
+                        futures = [executor.submit(trainMember, descriptorX, descriptorY, *task) for task in tasks]
+                        results = [future.result() for future in futures]
+        finally:
+            sharedX = sharedY = None
+            for block in blocks:
+                releaseSharedArray(block)
+
+        members = []
+        for (parameters, history) in results:
+            member = NeuralNetwork(**config)
+            member.setParameters(parameters)
+            members.append(member)
+        self.setMembers(members)
+
+        return [history for (parameters, history) in results]
+
+    def setMembers(self, members):
+        first = members[0]
+        for member in members:
+            if member.getConfig() != first.getConfig():
+                raise ValueError("All members of an ensemble need the same architecture: "
+                    + str(member.getConfig()) + " != " + str(first.getConfig()) + ".")
+            member.scaler = self.scaler
+
+        self.members = list(members)
+        self.output = first.output
+        self.outputSize = first.outputSize
+        self.combine()
+
+    def combine(self):
+        # builds the weights of one wide network, which computes all members at once
+        self.weights = []
+        self.biases = []
+        self.activations = [layer.activation for layer in self.members[0].layers]
+
+        for i in range(len(self.members[0].layers)):
+            layers = [member.layers[i] for member in self.members]
+            if i == 0:
+                weights = np.concatenate([layer.weights for layer in layers], axis=1)
+            else:
+                weights = np.zeros((sum(layer.getInputSize() for layer in layers),
+                    sum(layer.getOutputSize() for layer in layers)))
+                (row, column) = (0, 0)
+                for layer in layers:
+                    weights[row:row + layer.getInputSize(), column:column + layer.getOutputSize()] = layer.weights
+                    row += layer.getInputSize()
+                    column += layer.getOutputSize()
+
+            self.weights.append(weights)
+            self.biases.append(None if layers[0].bias is None else np.concatenate([layer.bias for layer in layers]))
+
+    # Averaged outputs of all members, computed chunk by chunk with one matrix
+    # product per layer (like NeuralNetwork.predictBatch)
+    def predictBatch(self, X, out=None, dtype=np.float64, chunkSize=65536):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)    # single step
+
+        if out is None:
+            out = np.empty((len(X), self.outputSize), dtype=dtype)
+
+        members = len(self.members)
+        bufferSize = max(min(chunkSize, len(X)), 1)
+        weights = [np.asarray(W, dtype=dtype) for W in self.weights]
+        biases = [None if b is None else np.asarray(b, dtype=dtype) for b in self.biases]
+        buffers = [np.empty((bufferSize, W.shape[1]), dtype=dtype) for W in weights]
+
+        for start in range(0, len(X), chunkSize):
+            activations = np.asarray(X[start:start + chunkSize], dtype=dtype)
+            rows = len(activations)
+
+            for (activation, W, b, buffer) in zip(self.activations, weights, biases, buffers):
+                np.dot(activations, W, out=buffer[:rows])
+                if b is not None:
+                    buffer[:rows] += b
+                # the activation works per member (softmax over the outputs of one member)
+                activations = activate(activation, buffer[:rows].reshape(rows, members, -1)).reshape(rows, -1)
+
+            np.mean(activations.reshape(rows, members, -1), axis=1, out=out[start:start + rows])
+
+        return out
+
+    def outputToLabels(self, outputs):
+        return self.members[0].outputToLabels(outputs)
+
+    # Stores all members and the scaler in one model file
+    def save(self, path):
+        header = {"ensemble": len(self.members), "scalerSamples": self.scaler.sampleCtr}
+        arrays = {"scalerMaxAbs": self.scaler.getMaxAbs()}
+        for (i, member) in enumerate(self.members):
+            (memberHeader, memberArrays) = member.getModelData()
+            memberArrays.pop("scalerMaxAbs")
+            header["member" + str(i)] = memberHeader
+            arrays.update({"member" + str(i) + "." + name: array for (name, array) in memberArrays.items()})
+
+        writeModelFile(path, header, arrays)
+
+    def load(self, path, mmap=True):
+        (header, arrays) = readModelFile(path, mmap)
+        if "ensemble" not in header:
+            raise ValueError("The model file \"" + str(path) + "\" contains no ensemble.")
+
+        self.scaler = FeatureScaler(len(arrays["scalerMaxAbs"]))
+        self.scaler.setMaxAbs(arrays["scalerMaxAbs"], header["scalerSamples"])
+
+        members = []
+        for i in range(header["ensemble"]):
+            prefix = "member" + str(i) + "."
+            memberArrays = {name[len(prefix):]: array for (name, array) in arrays.items() if name.startswith(prefix)}
+            member = NeuralNetwork()
+            member.setModelData(header["member" + str(i)], memberArrays)
+            members.append(member)
+        self.setMembers(members)
+
+        return self
+
+    # Removes the member checkpoints of fit (e.g. after the ensemble was saved)
+    def removeCheckpoints(self, checkpointDirectory):
+        for i in range(len(self.members)):
+            Checkpointer(getMemberCheckpointPath(checkpointDirectory, i)).remove()
+
+    # getter
+    def getMembers(self):
+        return self.members
+
+def getMemberCheckpointPath(checkpointDirectory, i):
+    return os.path.join(checkpointDirectory, "member" + str(i) + ".nn")
+
+# Runs in the worker processes: trains one seeded member on the shared dataset
+# and returns its parameters and loss history
+def trainMember(descriptorX, descriptorY, config, seed, optimizer, checkpointPath, checkpointInterval, fitArguments):
+    blocks = []
+    try:
+        (block, X) = attachSharedArray(descriptorX)
+        blocks.append(block)
+        (block, y) = attachSharedArray(descriptorY)
+        blocks.append(block)
+
+        np.random.seed(seed)    # initial weights and order of the mini-batches
+        neuralNetwork = NeuralNetwork(**config)
+        checkpointer = None if checkpointPath is None else Checkpointer(checkpointPath, checkpointInterval)
+        history = neuralNetwork.fit(X, y, optimizer, checkpointer=checkpointer, **fitArguments)
+
+        return ([np.array(parameter) for parameter in neuralNetwork.getParameters()], history)
+    finally:
+        X = y = None
+        for block in blocks:
+            releaseSharedArray(block, unlink=False)
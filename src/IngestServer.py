@@ -0,0 +1,188 @@
+# IngestServer.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides an asyncio server, which receives step data lines from
+# many sensors at once (TCP or Unix socket). Every connection has its own
+# Parser, the noise calibration is kept per device (so it survives
+# reconnects), the steps of all connections are classified together in shared
+# micro-batches and every connection gets one label per step back.
+# A sensor identifies itself with an optional first line "device:<id>",
+# otherwise its host address is the device id.
+
+import asyncio
+import numpy as np
+from src.Metrics import metrics
+from src.Calibration import CalibrationProfiles
+from src.Parser import Parser, LABELS, STEP_VALUES
+from src.StepData import StepData
+
+# label number --> label name
+LABEL_NAMES = {number: name for (name, number) in LABELS.items()}
+
+class IngestServer(object):
+    def __init__(self, neuralNetwork, batchSize=256, maxLatency=0.01, maxPending=1024, applyCalibration=False,
+            profiles=None):
+        # parameters
+        self.neuralNetwork = neuralNetwork
+        self.batchSize = batchSize          # max. amount of steps per prediction
+        self.maxLatency = maxLatency        # max. time (in s) a step waits for its micro-batch
+        self.maxPending = maxPending        # max. amount of unanswered steps per connection
+        self.applyCalibration = applyCalibration    # subtract the noise mean of every sensor from its steps
+        self.profiles = CalibrationProfiles() if profiles is None else profiles    # device id --> noise calibration
+        self.parsers = {}                   # peer name --> parser of the connection
+        self.stepQueue = None
+        self.batcherTask = None
+        self.servers = []
+
+    async def start(self, host="127.0.0.1", port=0, unixPath=None):
+        # starts the batcher and a TCP (or Unix socket) server, returns the server
+        if self.batcherTask is None:
+            self.stepQueue = asyncio.Queue(maxsize=self.batchSize * 4)
+            self.batcherTask = asyncio.ensure_future(self.runBatcher())
+
+        if unixPath is None:
+            server = await asyncio.start_server(self.handleConnection, host, port)
+        else:
+            server = await asyncio.start_unix_server(self.handleConnection, unixPath)
+        self.servers.append(server)
+
+        return server
+
+    async def stop(self):
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+
+        if self.batcherTask is not None:
+            self.batcherTask.cancel()
+            self.batcherTask = None
+
+    def serveForever(self, host="127.0.0.1", port=5000, unixPath=None):
+        async def serve():
+            server = await self.start(host, port, unixPath)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(serve())
+
+    async def handleConnection(self, reader, writer):
+        peerName = writer.get_extra_info("peername")
+        peer = str(peerName or id(writer))
+        parser = Parser()
+        deviceId = peerName[0] if isinstance(peerName, tuple) else None    # host address (without port)
+        profile = None      # created with the first noise or step line, so a device line can come first
+        self.parsers[peer] = parser
+
+        # futures of the steps in arrival order; a full queue stops reading from
+        # this connection until the answers were sent (backpressure)
+        pending = asyncio.Queue(maxsize=self.maxPending)
+        writerTask = asyncio.ensure_future(self.writeResults(writer, pending))
+        stepData = StepData()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if len(line) == 0:
+                    break   # connection closed by the sensor
+                if line.startswith(b"device:"):
+                    deviceId = line[7:].decode("utf-8", "replace").strip()
+                    if profile is not None:
+                        profile = self.profiles.getProfile(deviceId)
+                        parser.setCalibration(profile, self.applyCalibration)
+                    continue
+
+                try:
+                    for stepData in parser.iterLines([line], stepData):
+                        if profile is None and deviceId is not None:
+                            profile = self.useProfile(parser, deviceId)
+                        step = np.array(stepData.getAccelerationData(), dtype=np.float32)
+                        if step.shape != (STEP_VALUES,):
+                            # would break the shared batch of all connections
+                            raise ValueError("The step contains " + str(step.size) + " instead of "
+                                + str(STEP_VALUES) + " acceleration values.")
+                        if self.applyCalibration and parser.calibration.isCalibrated():
+                            parser.calibration.apply(step, out=step)
+
+                        future = asyncio.get_running_loop().create_future()
+                        await self.stepQueue.put((step, future))
+                        await pending.put(future)
+                    if profile is None and deviceId is not None and parser.calibration.isCalibrated():
+                        profile = self.useProfile(parser, deviceId)     # first noise line
+                except ValueError as error:
+                    future = asyncio.get_running_loop().create_future()
+                    future.set_result("error: " + str(error))
+                    await pending.put(future)
+        finally:
+            try:
+                if not writerTask.done():
+                    await pending.put(None)
+                await writerTask    # raises e.g. if the connection was reset
+            finally:
+                writer.close()
+                del self.parsers[peer]
+
+    # The parser continues with the profile of the device; the noise it has
+    # read so far is added to it
+    def useProfile(self, parser, deviceId):
+        profile = self.profiles.getProfile(deviceId).merge(parser.calibration)
+        parser.setCalibration(profile, self.applyCalibration)
+        return profile
+
+    async def writeResults(self, writer, pending):
+        while True:
+            future = await pending.get()
+            if future is None:
+                break
+
+            try:
+                answer = await future
+            except Exception as error:
+                answer = "error: " + str(error)     # the batch of the step failed
+            writer.write((answer + "\n").encode("utf-8"))
+            if pending.empty():
+                await writer.drain()
+
+    async def runBatcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.stepQueue.get()]
+
+            # collect the steps of all connections until the batch is full or
+            # the latency budget of the first step is used up
+            deadline = loop.time() + self.maxLatency
+            while len(items) < self.batchSize:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.stepQueue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # a failing batch is answered with errors, the batcher keeps running
+            try:
+                steps = np.stack([step for (step, future) in items])
+                self.neuralNetwork.scaler.transform(steps, out=steps)
+
+                # the prediction runs in a worker thread to keep the event loop responsive
+                outputs = await loop.run_in_executor(None, self.neuralNetwork.predictBatch, steps)
+                labels = self.neuralNetwork.outputToLabels(outputs)
+            except Exception as error:
+                metrics.increment("ingest_batches_failed_total")
+                metrics.event("ingest_batch_failed", "Classifying a batch of " + str(len(items)) + " steps failed: "
+                    + str(error), steps=len(items))
+                for (step, future) in items:
+                    if not future.done():
+                        future.set_exception(ValueError("Classifying the step failed: " + str(error)))
+                continue
+
+            for ((step, future), label) in zip(items, labels):
+                if not future.done():
+                    future.set_result(LABEL_NAMES[int(label)])
+
+    # getter
+    def getProfiles(self):
+        return self.profiles
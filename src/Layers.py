@@ -0,0 +1,125 @@
+# Layers.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides the fully connected layers the neural network is built
+# of. Every layer caches its input and output for the back-propagation and
+# writes its gradients into buffers, which are allocated once
+
+import numpy as np
+
+ACTIVATIONS = ("sigmoid", "tanh", "relu", "linear", "softmax")
+
+# activations with a derivative in activationDerivative (softmax and linear
+# are only valid for the output layer)
+HIDDEN_ACTIVATIONS = ("sigmoid", "tanh", "relu")
+
+class DenseLayer(object):
+    def __init__(self, inputSize, outputSize, activation="sigmoid", useBias=False):
+        if activation not in ACTIVATIONS:
+            raise ValueError("The activation function \"" + str(activation) + "\" is not supported.")
+
+        # parameters
+        self.activation = activation
+        self.weights = np.random.randn(inputSize, outputSize)
+        self.bias = np.zeros(outputSize) if useBias else None
+
+        # gradient buffers
+        self.gradWeights = np.zeros_like(self.weights)
+        self.gradBias = None if self.bias is None else np.zeros_like(self.bias)
+
+        # cached activations of the last forward pass
+        self.input = None
+        self.output = None
+
+    def forward(self, X):
+        self.input = X
+        self.output = self.predict(X)
+        return self.output
+
+    # Forward pass without caching; out can be a preallocated buffer
+    def predict(self, X, out=None):
+        if out is None:
+            out = np.dot(X, self.weights)
+        else:
+            np.dot(X, self.weights, out=out)
+        if self.bias is not None:
+            out += self.bias
+
+        return activate(self.activation, out)
+
+    def backward(self, delta):
+        # delta: gradient of the loss with respect to the weighted input of this
+        # layer. Fills the gradient buffers and returns the gradient with respect
+        # to the input of the layer.
+        np.dot(self.input.T, delta, out=self.gradWeights)
+        if self.bias is not None:
+            np.sum(delta, axis=0, out=self.gradBias)
+
+        return np.dot(delta, self.weights.T)
+
+    def getActivationDerivative(self):
+        # derivative of the activation function at the cached output
+        return activationDerivative(self.activation, self.output)
+
+    def setWeights(self, weights):
+        self.weights = weights
+        self.gradWeights = np.zeros(np.shape(weights))
+
+    def setBias(self, bias):
+        self.bias = bias
+        self.gradBias = None if bias is None else np.zeros(np.shape(bias))
+
+    # getter
+    def getParameters(self):
+        return [self.weights] if self.bias is None else [self.weights, self.bias]
+
+    def getGradients(self):
+        return [self.gradWeights] if self.bias is None else [self.gradWeights, self.gradBias]
+
+    def getInputSize(self):
+        return self.weights.shape[0]
+
+    def getOutputSize(self):
+        return self.weights.shape[1]
+
+# Applies the activation function in place and returns t
+def activate(activation, t):
+    if activation == "sigmoid":
+        np.negative(t, out=t)
+        with np.errstate(over="ignore"):   # exp overflows to inf --> sigmoid is 0
+            np.exp(t, out=t)
+        t += 1
+        np.reciprocal(t, out=t)
+    elif activation == "tanh":
+        np.tanh(t, out=t)
+    elif activation == "relu":
+        np.maximum(t, 0, out=t)
+    elif activation == "softmax":
+        t -= np.amax(t, axis=-1, keepdims=True)    # numerically stable
+        np.exp(t, out=t)
+        t /= np.sum(t, axis=-1, keepdims=True)
+
+    return t
+
+# Derivative of the activation function, expressed through its output a
+# (softmax is only used together with the cross-entropy loss, which already
+# contains its derivative)
+def activationDerivative(activation, a):
+    if activation == "sigmoid":
+        return a * (1 - a)
+    elif activation == "tanh":
+        return 1 - np.square(a)
+    elif activation == "relu":
+        return (a > 0).astype(a.dtype)
+    else:
+        return np.ones_like(a)
+
+# Maps the outputs of an output layer with the given activation to the labels
+# of the Parser (shared by NeuralNetwork and QuantizedPredictor): inverse of
+# NeuralNetwork.encodeLabels (one-hot or label / 3)
+def outputToLabels(activation, outputs):
+    if activation == "softmax":
+        return np.argmax(outputs, axis=1).astype(np.int8)
+    return np.clip(np.rint(np.asarray(outputs).ravel() * 3), 0, 2).astype(np.int8)
@@ -1,34 +1,56 @@
 # MachineLearning.py
 # Author: Armin Müller
 # Created on 19.10.2018
-# Last Modified on: 17.04.2019
+# Last Modified on: 18.10.2026
 #
 # This project aims to use a neural network to decide which type of step 
 # the given step data represents
+#
+# Usage: python -m src.MachineLearning                    (interactive)
+#        python -m src.MachineLearning train data.txt --model model.nn
+#        python -m src.MachineLearning predict model.nn data.txt --results results.txt
+#        python -m src.MachineLearning export model.nn model.int8.nn --data data.txt
+#        python -m src.MachineLearning select data.txt --hidden 3 6 9 --learning-rate 0.01 0.001 --folds 5
+#        python -m src.MachineLearning serve model.nn --port 5000
+#        python -m src.MachineLearning bench --lines 100000
 
+import argparse
 import numpy as np
-from src.Parser import Parser
-import repackage
-repackage.up()
+from src.Parser import Parser, LABELS
+from src.StepBatch import StepBatch
+from src.DatasetCache import DatasetCache
+from src.Optimizer import SGD, Adam
+from src.ModelFile import writeModelFile, readModelFile
+from src.Scaler import FeatureScaler
+from src.Layers import DenseLayer, activate, outputToLabels, HIDDEN_ACTIVATIONS
+from src.ResultWriter import ResultWriter
+from src.Metrics import metrics, createSink
+from src.Checkpointer import Checkpointer, CheckpointMismatchError
+import logging
 import sys
 import time
 import os
 import datetime
-import serial
 
 class NeuralNetwork:
-    def __init__(self):
+    # The default network is the original 9-3-1 sigmoid network without biases,
+    # trained on the squared loss. With output="softmax" the network has one
+    # output per label of the Parser and is trained on the cross-entropy loss.
+    def __init__(self, hiddenSizes=(3,), activation="sigmoid", output="sigmoid", useBias=False, inputSize=9):
         #parameters
         self.lastModifiedDay = 0
         self.listen = True
+        self.resultWriter = None
         
-        self.inputSize = 9
-        self.outputSize = 1
-        self.hiddenSize = 3
+        self.inputSize = inputSize
+        self.outputSize = len(LABELS) if output == "softmax" else 1
+        self.hiddenSize = hiddenSizes[0] if len(hiddenSizes) > 0 else 0
+        self.output = output
+        self.scaler = FeatureScaler(self.inputSize)     # scaling of the input, fitted on the training data
         
-        #weights
-        self.W1 = np.random.randn(self.inputSize, self.hiddenSize)  # (9x3) weight matrix from input to hidden layer
-        self.W2 = np.random.randn(self.hiddenSize, self.outputSize) # (3x1) weight matrix from hidden to output layer
+        #layers (the weight matrices are initialized with np.random.randn)
+        self.buildLayers([inputSize] + list(hiddenSizes) + [self.outputSize],
+            [activation] * len(hiddenSizes) + [output], useBias)
         
         #hardcoded weights, if they're wanted/needed
 #         self.W1 = np.matrix([[-58.17468245205648, -4.352426965518547, -6.694536989324792],
@@ -42,6 +64,33 @@ class NeuralNetwork:
 #         [10.89464302328708, -1.4680942999995534, -2.3742310728376346]])   
 #         self.W2 = np.matrix([[1.4298028915296566], [-3.002928109567485], [1.7687637949560497]])    
 
+    def buildLayers(self, layerSizes, activations, useBias):
+        for activation in activations[:-1]:
+            if activation not in HIDDEN_ACTIVATIONS:
+                raise ValueError("The activation function \"" + str(activation) + "\" is not supported for hidden "
+                    + "layers (" + ", ".join(HIDDEN_ACTIVATIONS) + ").")
+
+        self.layers = []
+        for i in range(len(layerSizes) - 1):
+            self.layers.append(DenseLayer(layerSizes[i], layerSizes[i + 1], activations[i], useBias))
+
+    # first and second weight matrix, as used by the original 9-3-1 network
+    @property
+    def W1(self):
+        return self.layers[0].weights
+
+    @W1.setter
+    def W1(self, weights):
+        self.layers[0].setWeights(weights)
+
+    @property
+    def W2(self):
+        return self.layers[1].weights
+
+    @W2.setter
+    def W2(self, weights):
+        self.layers[1].setWeights(weights)
+
     # Activation function
     def sigmoid(self, t):
         return 1 / (1 + np.exp(-t))
@@ -50,28 +99,143 @@ class NeuralNetwork:
     def sigmoidDerivative(self, p):
         return p * (1 - p)
 
-    #forward propagation through the network
+    #forward propagation through the network (every layer caches its activations)
     def feedForward(self, X):
-        self.z = np.dot(X, self.W1)         # weighted input: dot product of X (input) and first set of 9x3 weights
-        self.z2 = self.sigmoid(self.z)      # activation function
-        self.z3 = np.dot(self.z2, self.W2)  # weighted intermediate: dot product of hidden layer (z2) and second set of 3x1 weights
-        o = self.sigmoid(self.z3)           # final activation function
+        o = X
+        for layer in self.layers:
+            o = layer.forward(o)
         return o
 
     #back-propagate through the network
-    def backPropagation(self, X, y, o):
-        self.o_error = y - o                                            # error in output (y is the original output/label)
-        self.o_delta = self.o_error * self.sigmoidDerivative(o)         # applying derivative of sigmoid to error
-    
-        self.z2_error = self.o_delta.dot(self.W2.T)                     # z2 error: how much our hidden layer weights contributed to output error
-        self.z2_delta = self.z2_error * self.sigmoidDerivative(self.z2) # applying derivative of sigmoid to z2 error
-    
-        self.W1 += X.T.dot(self.z2_delta)                               # adjusting first set of weights (input --> hidden)
-        self.W2 += self.z2.T.dot(self.o_delta)                          # adjusting second set of weights (hidden --> output)
+    def backPropagation(self, X, y, o, optimizer=None):
+        # gradient of the loss with respect to the weighted input of the output layer
+        if self.output == "softmax":
+            delta = o - y                                               # cross-entropy loss with softmax
+        else:
+            delta = (o - y) * self.layers[-1].getActivationDerivative() # squared loss
+
+        if optimizer is not None:
+            delta /= len(X)     # mean gradients over the (mini-)batch
+
+        for i in range(len(self.layers) - 1, -1, -1):
+            inputError = self.layers[i].backward(delta)                 # how much the input of the layer contributed to the error
+            if i > 0:
+                delta = inputError * self.layers[i - 1].getActivationDerivative()
+
+        if optimizer is None:
+            for (parameter, gradient) in zip(self.getParameters(), self.getGradients()):
+                parameter -= gradient                                   # adjusting the weights with the summed gradients
+        else:
+            optimizer.update(self.getParameters(), self.getGradients())
 
-    def train(self, X, y):
+    def train(self, X, y, optimizer=None):
         o = self.feedForward(X)
-        self.backPropagation(X, y, o)
+        self.backPropagation(X, y, o, optimizer)
+
+    def getParameters(self):
+        return [parameter for layer in self.layers for parameter in layer.getParameters()]
+
+    def getGradients(self):
+        return [gradient for layer in self.layers for gradient in layer.getGradients()]
+
+    def setParameters(self, parameters):
+        # replaces the parameters (same order as getParameters()), e.g. by views
+        # into a shared memory block
+        parameters = iter(parameters)
+        for layer in self.layers:
+            layer.setWeights(next(parameters))
+            if layer.bias is not None:
+                layer.setBias(next(parameters))
+
+    # arguments to create a NeuralNetwork of the same architecture
+    def getConfig(self):
+        return {"hiddenSizes": [layer.getOutputSize() for layer in self.layers[:-1]],
+            "activation": self.layers[0].activation if len(self.layers) > 1 else "sigmoid",
+            "output": self.output, "useBias": self.layers[0].bias is not None, "inputSize": self.inputSize}
+
+    def getLoss(self, X, y):
+        o = self.predictChunks(X, None, np.float64, 65536)     # untimed: not a prediction latency
+        if self.output == "softmax":
+            return float(-np.mean(np.sum(y * np.log(o + 1e-12), axis=1)))  # cross-entropy loss
+        return float(np.mean(np.square(y - o)))     # mean sum squared loss
+
+    # Trains in epochs of shuffled mini-batches until the loss stops improving
+    # (early stopping), falls below maxLossValue or maxEpochs is reached.
+    # trainEpoch(epoch) can replace the mini-batch loop of one epoch (see
+    # ParallelTrainer). With a Checkpointer the training is saved periodically
+    # and resumed from its last checkpoint.
+    def fit(self, X, y, optimizer=None, batchSize=32, maxEpochs=1000, patience=20, minDelta=1e-6,
+            maxLossValue=None, validationData=None, shuffle=True, verbose=False, trainEpoch=None, checkpointer=None):
+        if optimizer is None:
+            optimizer = SGD()
+
+        history = []
+        bestLoss = np.inf
+        bestParameters = [parameter.copy() for parameter in self.getParameters()]
+        epochsWithoutImprovement = 0
+        startEpoch = 0
+
+        state = None if checkpointer is None else checkpointer.load(self, optimizer)
+        if state is not None:
+            history = state["history"]
+            bestLoss = state["bestLoss"]
+            bestParameters = state["bestParameters"]
+            epochsWithoutImprovement = state["epochsWithoutImprovement"]
+            startEpoch = maxEpochs if state["finished"] else state["epoch"]
+            metrics.event("train_resumed", "Training resumed from " + str(checkpointer.path) + " after epoch "
+                + str(state["epoch"]) + ".", level=logging.INFO, epoch=state["epoch"])
+
+        for epoch in range(startEpoch, maxEpochs):
+            epochStart = time.perf_counter()
+            if trainEpoch is not None:
+                trainEpoch(epoch)
+            else:
+                order = np.random.permutation(len(X)) if shuffle else np.arange(len(X))
+                for start in range(0, len(X), batchSize):
+                    indices = order[start:start + batchSize]
+                    self.train(X[indices], y[indices], optimizer)
+            epochTime = time.perf_counter() - epochStart
+
+            # validation loss decides about early stopping, if available
+            if validationData is None:
+                loss = self.getLoss(X, y)
+            else:
+                loss = self.getLoss(*validationData)
+            history.append(loss)
+
+            if metrics.enabled:
+                iterations = -(-len(X) // batchSize)
+                metrics.increment("train_epochs_total")
+                metrics.increment("train_iterations_total", iterations)
+                metrics.setGauge("train_iterations_per_second", iterations / max(epochTime, 1e-9))
+                metrics.record("train_loss", loss)
+            if verbose:
+                metrics.event("train_epoch", "Epoch " + str(epoch + 1) + ": loss = " + str(loss),
+                    level=logging.INFO, epoch=epoch + 1, loss=loss)
+
+            if loss < bestLoss - minDelta:
+                bestLoss = loss
+                bestParameters = [parameter.copy() for parameter in self.getParameters()]
+                epochsWithoutImprovement = 0
+            else:
+                epochsWithoutImprovement += 1
+
+            # a training stopped by maxEpochs is continued, if it's resumed with more epochs
+            finished = (maxLossValue is not None and loss <= maxLossValue) or epochsWithoutImprovement >= patience
+            if checkpointer is not None and (finished or epoch == maxEpochs - 1 or checkpointer.shouldSave(epoch)):
+                checkpointer.save(self, optimizer, {"epoch": epoch + 1, "history": history, "bestLoss": bestLoss,
+                    "bestParameters": bestParameters, "epochsWithoutImprovement": epochsWithoutImprovement,
+                    "finished": finished})
+
+            if finished:
+                break
+
+        # keep the best weights seen during training
+        if len(history) > 0 and history[-1] > bestLoss:
+            for (parameter, bestParameter) in zip(self.getParameters(), bestParameters):
+                parameter[...] = bestParameter
+
+        return history
         
 # ------------------------------------------------------------------------------
 # Methods for usage in the context of the IoT-practical
@@ -80,34 +244,81 @@ class NeuralNetwork:
         np.savetxt("w1.txt", self.W1, fmt="%s")
         np.savetxt("w2.txt", self.W2, fmt="%s")
 
+    def loadWeights(self, w1Path="w1.txt", w2Path="w2.txt"):
+        # counterpart of saveWeights (e.g. for w1_working.txt / w2_working.txt)
+        self.W1 = np.loadtxt(w1Path, ndmin=2)
+        self.W2 = np.loadtxt(w2Path, ndmin=2).reshape(self.W1.shape[1], -1)
+
+    # Stores weights, layer sizes and input scaling in one binary model file
+    def save(self, path):
+        writeModelFile(path, *self.getModelData())
+
+    # Loads a model file written by save(). With mmap the weights are mapped
+    # from the file instead of being read (copy-on-write, training still works)
+    def load(self, path, mmap=True):
+        self.setModelData(*readModelFile(path, mmap))
+        return self
+
+    # header and arrays of a model file (also used by the Checkpointer)
+    def getModelData(self):
+        header = {"inputSize": self.inputSize, "output": self.output, "scalerSamples": self.scaler.sampleCtr,
+            "layerSizes": [self.inputSize] + [layer.getOutputSize() for layer in self.layers],
+            "activations": [layer.activation for layer in self.layers],
+            "useBias": self.layers[0].bias is not None}
+
+        arrays = {"scalerMaxAbs": self.scaler.getMaxAbs()}
+        for (i, layer) in enumerate(self.layers):
+            arrays["W" + str(i + 1)] = layer.weights
+            if layer.bias is not None:
+                arrays["b" + str(i + 1)] = layer.bias
+
+        return (header, arrays)
+
+    def setModelData(self, header, arrays):
+        if "layerSizes" not in header:
+            # files of the fixed 9-3-1 network
+            header.update(output="sigmoid", useBias=False, activations=["sigmoid", "sigmoid"],
+                layerSizes=[header["inputSize"], header["hiddenSize"], header["outputSize"]])
+
+        self.inputSize = header["inputSize"]
+        self.output = header["output"]
+        self.outputSize = header["layerSizes"][-1]
+        self.hiddenSize = header["layerSizes"][1] if len(header["layerSizes"]) > 2 else 0
+        self.buildLayers(header["layerSizes"], header["activations"], header["useBias"])
+        for (i, layer) in enumerate(self.layers):
+            layer.setWeights(arrays["W" + str(i + 1)])
+            if header["useBias"]:
+                layer.setBias(arrays["b" + str(i + 1)])
+
+        self.scaler = FeatureScaler(self.inputSize)
+        if "scalerMaxAbs" in arrays:
+            self.scaler.setMaxAbs(arrays["scalerMaxAbs"], header["scalerSamples"])
+        elif "inputScale" in header:
+            # files without a fitted scaler store one scale for all features
+            self.scaler.setMaxAbs(np.full(self.inputSize, header["inputScale"]))
+
+    # Maps the outputs of the NN to the labels of the Parser (labelPlaceholder: 0, noMove: 1, slowWalk: 2)
+    def outputToLabels(self, outputs):
+        return outputToLabels(self.output, outputs)
+
+    # Maps the labels of the Parser to the targets (y) of the training
+    def encodeLabels(self, labels):
+        labels = np.asarray(labels).ravel()
+        if self.output == "softmax":
+            return np.eye(self.outputSize, dtype=np.float32)[labels]    # one-hot encoding
+        return labels.reshape(-1, 1) / np.float32(3)    # max "score" is 3 (amount of different step labels (noMove, slowWalk, labelPlaceholder))
+
     def saveResults(self, resultArray):
-        resultPath = "classificationResults.txt"
-        date = time.strftime("%Y%m%d")
-        currentDate = self.dateToNthDay(date)
-        
-        if os.path.exists(resultPath) & ((currentDate - self.lastModifiedDay) == 0):
-            appendMode = 'a'    # Append only at the end
-        else:
-            appendMode = 'w'    # Create a new file
-        
-        file = open(resultPath, appendMode)
-        for i in range(len(resultArray)):
-            # For DEBUGGING
-            #print(str(resultArray[i]))
-            
-            if int(np.round(resultArray[i] * 10)) != 5:
-                file.write(str("noMove"))
-            elif int(np.round(resultArray[i] * 10)) == 5:
-                file.write(str("slowWalk"))
-            else: 
-                file.write(str("labelPlaceholder"))
-            
-            if (i != len(resultArray) - 1):
-                file.write(",")
-        file.close()
+        # the results of one day are appended to the same file, a new day
+        # overwrites it (see ResultWriter)
+        if self.resultWriter is None:
+            self.resultWriter = ResultWriter("classificationResults.txt")
+
+        self.resultWriter.write(self.outputToLabels(resultArray))
+        self.resultWriter.flush()
         
         # Update last time modified parameter
-        self.lastModifiedDay = currentDate
+        self.lastModifiedDay = self.dateToNthDay(time.strftime("%Y%m%d"))
         
     def dateToNthDay(self, date):
         date = datetime.datetime.strptime(date, "%Y%m%d")
@@ -121,7 +332,41 @@ class NeuralNetwork:
         
     def predictWithoutPrint(self, inputForPrediction):
         return self.feedForward(inputForPrediction)
+
+    # Inference on whole arrays: works through the input in chunks of chunkSize
+    # rows with buffers, which are allocated once per call, and doesn't store
+    # any intermediate results on the object (so it is thread-safe)
+    def predictBatch(self, X, out=None, dtype=np.float64, chunkSize=65536):
+        with metrics.timer("predict_latency_seconds"):
+            return self.predictChunks(X, out, dtype, chunkSize)
+
+    def predictChunks(self, X, out, dtype, chunkSize):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)    # single step
+
+        if out is None:
+            out = np.empty((len(X), self.outputSize), dtype=dtype)
+
+        bufferSize = max(min(chunkSize, len(X)), 1)
+        weights = [np.asarray(layer.weights, dtype=dtype) for layer in self.layers]
+        biases = [None if layer.bias is None else np.asarray(layer.bias, dtype=dtype) for layer in self.layers]
+        buffers = [np.empty((bufferSize, layer.getOutputSize()), dtype=dtype) for layer in self.layers]
+
+        for start in range(0, len(X), chunkSize):
+            activations = np.asarray(X[start:start + chunkSize], dtype=dtype)
+            rows = len(activations)
+
+            for (layer, W, b, buffer) in zip(self.layers, weights, biases, buffers):
+                np.dot(activations, W, out=buffer[:rows])
+                if b is not None:
+                    buffer[:rows] += b
+                activations = activate(layer.activation, buffer[:rows])
+            out[start:start + rows] = activations
+
+        return out
         
+    # Unclassified data is scaled with the scaler fitted during training
     def getUnclassifiedDataToClassify(self, nonInteractive, unclassifiedDataArray):
         if (nonInteractive == True):
             parsedUnclassifiedData = unclassifiedDataArray
@@ -129,39 +374,39 @@ class NeuralNetwork:
             unclassifiedDataPath = input("Please enter the path to a file with data, which should be classified: ")
             unclassifedDataParser = Parser()
             unclassifedDataParser.setDestination(unclassifiedDataPath)
-            unclassifedDataParser.processData()
+            unclassifedDataParser.processDataBatch()
 
             # Retrieve data back
-            parsedUnclassifiedData = unclassifedDataParser.getDataArray()
+            parsedUnclassifiedData = unclassifedDataParser.getDataBatch()
         
         # Set necessary input arrays
-        (inputValues, inputLabels) = self.setInputForClassificationScaled(parsedUnclassifiedData)
+        (inputValues, inputLabels) = self.setInputForClassificationScaled(parsedUnclassifiedData, False)
         
         return (inputValues, inputLabels)
 
-    def setInputForClassificationScaled(self, parsedDataArray):
+    # With fitScaler the scaling statistics are computed on the given data
+    # (training), otherwise the already fitted scaler is applied (prediction)
+    def setInputForClassificationScaled(self, parsedDataArray, fitScaler=True):
         # Set X (input step data values) and y (input labels corresponding to the step data values)
-        inputValues = []
-        inputLabels = []
-        
-        for i in range(len(parsedDataArray)):
-            accArray = np.asarray(parsedDataArray[i].getAccelerationData(), dtype=float)
-            labelArray = np.asarray([parsedDataArray[i].getLabel()], dtype=float)
-            
-            inputValues.append(accArray)
-            inputLabels.append(labelArray)
-            
-        inputValues = np.asarray(inputValues)
-        inputLabels = np.asarray(inputLabels)
-        
+        if isinstance(parsedDataArray, StepBatch):
+            # columnar data: no per-row conversion needed, keeps float32
+            inputValues = parsedDataArray.getInput()
+            inputLabels = self.encodeLabels(parsedDataArray.getLabels())
+        else:
+            inputValues = np.array([stepData.getAccelerationData() for stepData in parsedDataArray], dtype=float)
+            inputLabels = self.encodeLabels([stepData.getLabel() for stepData in parsedDataArray]).astype(float)
+
         # scale units
-        inputValues /= np.amax(inputValues) # maximum of X array
-        inputLabels /= 3                    # max "score" is 3 (amount of different step labels (noMove, slowWalk, labelPlaceholder))
+        if fitScaler or not self.scaler.isFitted():
+            self.scaler.fit(inputValues)        # maximum of every feature
+        inputValues = self.scaler.transform(inputValues)
         
         return (inputValues, inputLabels)
         
     def listenOnPort(self):
         # Note that this method might only return when the data stream on the com-port ends
+        import serial   # only needed for real hardware
+
         rawInputData = []
         port = "COM9"
         baudrate = 115200
@@ -177,9 +422,425 @@ class NeuralNetwork:
         return rawInputData
     
 # ------------------------------------------------------------------------------
-# Usage of the NN
+# Library API for batch jobs (no interactive input)
 
-if __name__ == "__main__":
+# Parses a single file (cached by the DatasetCache) or several files, a
+# directory or a glob pattern (in parallel by the BulkParser). Returns the
+# batch and the ParseErrors (with strict = False invalid lines are skipped).
+def loadDataBatch(sources, useCache=True, applyCalibration=False, maxWorkers=None, strict=True):
+    if isinstance(sources, (list, tuple)) and len(sources) == 1:
+        sources = sources[0]
+
+    if isinstance(sources, (str, os.PathLike)) and os.path.isfile(sources):
+        parser = Parser(strict)
+        parser.setDestination(os.fspath(sources))
+        parser.applyCalibration = applyCalibration
+        if useCache:
+            DatasetCache().processData(parser)
+        else:
+            parser.processDataBatch()
+    else:
+        from src.BulkParser import BulkParser
+
+        parser = BulkParser(maxWorkers, applyCalibration=applyCalibration, strict=strict)
+        parser.setSources(sources)
+        parser.processData()
+
+    errors = parser.getErrors()
+    if len(errors) > 0:
+        metrics.event("parser_errors", "Lines which were skipped: " + errors.getSummary(), errors=errors.getCounts())
+
+    return (parser.getDataBatch(), errors)
+
+# Loads a model file of a NeuralNetwork, an Ensemble or a quantized model
+def loadModel(modelPath, mmap=True):
+    (header, arrays) = readModelFile(modelPath, mmap)
+    if "ensemble" in header:
+        from src.Ensemble import Ensemble
+
+        return Ensemble().load(modelPath, mmap)
+    elif "quantized" in header:
+        from src.Quantization import QuantizedPredictor
+
+        return QuantizedPredictor().load(modelPath, mmap)
+
+    neuralNetwork = NeuralNetwork()
+    neuralNetwork.setModelData(header, arrays)
+    return neuralNetwork
+
+# Trains a new NN on the given sources and saves it to modelPath (if given).
+# Returns the NN and the loss of every epoch. With checkpointPath the training
+# is checkpointed every checkpointInterval epochs and resumed from an existing
+# checkpoint. With ensembleSize > 1 an Ensemble of independently seeded NNs is
+# trained in maxWorkers processes (checkpointPath is a directory then) and
+# the loss histories of all members are returned. With parallel ("sync" or
+# "hogwild") one NN is trained data-parallel in maxWorkers processes (see
+# ParallelTrainer.py), batchSize is the batch size of every worker then.
+def trainModel(sources, modelPath="model.nn", hiddenSizes=(3,), activation="sigmoid", output="sigmoid",
+        useBias=False, learningRate=0.01, batchSize=64, maxEpochs=500, patience=25, maxLossValue=0.0225,
+        useCache=True, applyCalibration=False, seed=None, verbose=False, strict=True, checkpointPath=None,
+        checkpointInterval=10, ensembleSize=1, maxWorkers=None, parallel=None, threadsPerWorker=1):
+    if ensembleSize > 1 and parallel is not None:
+        raise ValueError("An ensemble can't be trained data-parallel (the members already run in parallel).")
+    if seed is not None:
+        np.random.seed(seed)
+
+    neuralNetwork = NeuralNetwork(tuple(hiddenSizes), activation, output, useBias)
+    (batch, errors) = loadDataBatch(sources, useCache, applyCalibration, strict=strict)
+    (X, y) = neuralNetwork.setInputForClassificationScaled(batch)
+    fitArguments = {"batchSize": batchSize, "maxEpochs": maxEpochs, "patience": patience,
+        "maxLossValue": maxLossValue, "verbose": verbose}
+
+    if ensembleSize > 1:
+        from src.Ensemble import Ensemble
+
+        model = Ensemble(scaler=neuralNetwork.scaler)
+        history = model.fit(X, y, ensembleSize, neuralNetwork.getConfig(), Adam(learningRate=learningRate),
+            maxWorkers=maxWorkers, threadsPerWorker=threadsPerWorker, checkpointDirectory=checkpointPath,
+            checkpointInterval=checkpointInterval, **fitArguments)
+    else:
+        model = neuralNetwork
+        checkpointer = None if checkpointPath is None else Checkpointer(checkpointPath, checkpointInterval)
+        if parallel is not None:
+            from src.ParallelTrainer import ParallelTrainer
+
+            trainer = ParallelTrainer(model, maxWorkers, parallel, threadsPerWorker, seed)
+            history = trainer.fit(X, y, Adam(learningRate=learningRate), checkpointer=checkpointer, **fitArguments)
+        else:
+            history = model.fit(X, y, optimizer=Adam(learningRate=learningRate), checkpointer=checkpointer,
+                **fitArguments)
+
+    if modelPath is not None:
+        model.save(modelPath)
+        if checkpointPath is not None:
+            # the training is complete, the next one mustn't resume it
+            if ensembleSize > 1:
+                model.removeCheckpoints(checkpointPath)
+            else:
+                checkpointer.remove()
+
+    return (model, history)
+
+# Evaluates hyperparameter candidates (dicts of hiddenSize, learningRate,
+# maxLossValue, ...) with stratified k-fold cross-validation (or one stratified
+# split with validationFraction) in maxWorkers processes (see ModelSelection.py).
+# Returns the results sorted by the validation accuracy; with modelPath a NN
+# with the best parameters is trained on all data and saved.
+def selectModel(sources, candidates, folds=5, validationFraction=None, config=None, fitArguments=None,
+        maxWorkers=None, seed=0, modelPath=None, useCache=True, applyCalibration=False, strict=True):
+    from src.ModelSelection import ModelSelection
+
+    (batch, errors) = loadDataBatch(sources, useCache, applyCalibration, strict=strict)
+    selection = ModelSelection(folds, validationFraction, maxWorkers, seed=seed, config=config,
+        fitArguments=fitArguments)
+    results = selection.search(batch, candidates)
+
+    if modelPath is not None:
+        selection.fitBest(batch).save(modelPath)
+
+    return results
+
+# Exports a trained NN as inference-only float32/int8 model (see
+# Quantization.py). The lookup table ranges are calibrated on the sources (if
+# given). Returns the accuracy report against the float64 model on them.
+def exportModel(neuralNetwork, path, dtype="int8", sources=None, useLookupTable=False, strict=True):
+    from src.Quantization import exportQuantized, QuantizedPredictor, accuracyReport
+
+    if isinstance(neuralNetwork, (str, os.PathLike)):
+        neuralNetwork = loadModel(neuralNetwork)
+    if not isinstance(neuralNetwork, NeuralNetwork):
+        raise ValueError("Only NeuralNetwork models can be exported (given: " + type(neuralNetwork).__name__ + ").")
+
+    X = None
+    labels = None
+    if sources is not None:
+        (batch, errors) = loadDataBatch(sources, useCache=False, strict=strict)
+        X = neuralNetwork.scaler.transform(batch.getInput())
+        labels = batch.getLabels()
+
+    exportQuantized(neuralNetwork, path, dtype, X)
+    if X is None:
+        return None
+
+    return accuracyReport(neuralNetwork, QuantizedPredictor(useLookupTable).load(path), X, labels)
+
+# Classifies the steps of the given sources with a trained NN or Ensemble (or
+# the path of a model file). Returns the label numbers and writes them to
+# resultPath (if given).
+def predictFile(model, sources, resultPath=None, format="text", useCache=False, applyCalibration=False,
+        strict=True):
+    if isinstance(model, (str, os.PathLike)):
+        model = loadModel(model)
+
+    (batch, errors) = loadDataBatch(sources, useCache, applyCalibration, strict=strict)
+    X = model.scaler.transform(batch.getInput())    # scaled like the training data
+    outputs = model.predictBatch(X)
+    labels = model.outputToLabels(outputs)
+
+    if resultPath is not None:
+        with ResultWriter(resultPath, format) as resultWriter:
+            resultWriter.write(labels, outputs)
+
+    return labels
+
+# Classifies steps until interrupted: either the lines of many sensors on a
+# TCP/Unix socket (IngestServer) or the lines of one serial port. The noise
+# calibration of every device is loaded from and saved to profilesPath (if
+# given), so it survives restarts of the server.
+def serveModel(model, host="127.0.0.1", port=5000, unixPath=None, serialPort=None, baudrate=115200,
+        batchSize=256, maxLatency=0.01, resultPath="classificationResults.txt", applyCalibration=False,
+        profilesPath=None):
+    if isinstance(model, (str, os.PathLike)):
+        model = loadModel(model)
+
+    if serialPort is None:
+        from src.IngestServer import IngestServer
+        from src.Calibration import CalibrationProfiles
+
+        profiles = CalibrationProfiles()
+        if profilesPath is not None and os.path.exists(profilesPath):
+            profiles.load(profilesPath)
+        try:
+            IngestServer(model, batchSize, maxLatency, applyCalibration=applyCalibration,
+                profiles=profiles).serveForever(host, port, unixPath)
+        finally:
+            if profilesPath is not None:
+                profiles.save(profilesPath)
+        return None
+
+    from src.StreamClassifier import StreamClassifier, openPort
+
+    with ResultWriter(resultPath) as resultWriter:
+        ser = openPort(serialPort, baudrate)
+        streamClassifier = StreamClassifier(model, ser, lambda labels, outputs: resultWriter.write(labels),
+            batchSize=batchSize, maxLatency=maxLatency)
+        streamClassifier.start()
+        try:
+            streamClassifier.join()
+        finally:
+            streamClassifier.stop()
+            ser.close()
+
+# ------------------------------------------------------------------------------
+# Command line interface
+
+def createArgumentParser():
+    argumentParser = argparse.ArgumentParser(prog="python -m src.MachineLearning",
+        description="Step recognition NN: training, prediction and classification servers. "
+        + "Without a command the interactive version is started.")
+    commands = argumentParser.add_subparsers(dest="command")
+
+    # options of all commands except bench
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--metrics", action="append", default=[], metavar="SINK",
+        help="export metrics: log, json:<path> or prometheus:<port> (can be given several times)")
+    common.add_argument("--quiet", action="store_true", help="only log warnings and errors")
+    common.add_argument("--lenient", dest="strict", action="store_false",
+        help="skip and count invalid lines instead of aborting")
+
+    train = commands.add_parser("train", parents=[common], help="train a new NN and save it as model file")
+    train.add_argument("data", nargs="+", help="input files, directories or glob patterns")
+    train.add_argument("--model", default="model.nn", help="path of the model file")
+    train.add_argument("--hidden", type=int, nargs="*", default=[3], help="sizes of the hidden layers")
+    train.add_argument("--activation", default="sigmoid", choices=HIDDEN_ACTIVATIONS,
+        help="activation of the hidden layers")
+    train.add_argument("--output", default="sigmoid", choices=["sigmoid", "softmax"])
+    train.add_argument("--bias", action="store_true", help="use bias vectors")
+    train.add_argument("--learning-rate", dest="learningRate", type=float, default=0.01)
+    train.add_argument("--batch-size", dest="batchSize", type=int, default=64)
+    train.add_argument("--max-epochs", dest="maxEpochs", type=int, default=500)
+    train.add_argument("--patience", type=int, default=25)
+    train.add_argument("--max-loss", dest="maxLossValue", type=float, default=0.0225)
+    train.add_argument("--seed", type=int)
+    train.add_argument("--no-cache", dest="useCache", action="store_false", help="don't use the dataset cache")
+    train.add_argument("--calibrate", action="store_true", help="subtract the noise mean from the data")
+    train.add_argument("--save-weights", dest="saveWeights", action="store_true", help="write w1.txt and w2.txt, too")
+    train.add_argument("--checkpoint", dest="checkpointPath",
+        help="checkpoint file (directory with --ensemble), an existing checkpoint is resumed")
+    train.add_argument("--checkpoint-interval", dest="checkpointInterval", type=int, default=10,
+        help="epochs between two checkpoints")
+    train.add_argument("--ensemble", dest="ensembleSize", type=int, default=1,
+        help="train an ensemble of this many independently seeded NNs")
+    train.add_argument("--parallel", choices=["sync", "hogwild"],
+        help="train data-parallel: averaged gradients (sync) or lock-free updates (hogwild)")
+    train.add_argument("--workers", dest="maxWorkers", type=int,
+        help="processes for --parallel or --ensemble (default: one per core)")
+    train.add_argument("--threads-per-worker", dest="threadsPerWorker", type=int, default=1,
+        help="BLAS threads of every worker process")
+
+    predict = commands.add_parser("predict", parents=[common], help="classify the steps of input files")
+    predict.add_argument("model", help="path of the model file")
+    predict.add_argument("data", nargs="+", help="input files, directories or glob patterns")
+    predict.add_argument("--results", default="classificationResults.txt", help="result file (strftime patterns allowed)")
+    predict.add_argument("--format", default="text", choices=["text", "csv", "binary"])
+    predict.add_argument("--cache", dest="useCache", action="store_true", help="use the dataset cache")
+    predict.add_argument("--calibrate", action="store_true", help="subtract the noise mean from the data")
+
+    serve = commands.add_parser("serve", parents=[common], help="classify the steps of sensors on a socket or a serial port")
+    serve.add_argument("model", help="path of the model file")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=5000)
+    serve.add_argument("--unix", dest="unixPath", help="listen on this Unix socket instead of TCP")
+    serve.add_argument("--serial", dest="serialPort", help="read from this serial port (e.g. COM9)")
+    serve.add_argument("--baudrate", type=int, default=115200)
+    serve.add_argument("--batch-size", dest="batchSize", type=int, default=256)
+    serve.add_argument("--max-latency", dest="maxLatency", type=float, default=0.01)
+    serve.add_argument("--results", default="classificationResults.txt", help="result file of the serial port")
+    serve.add_argument("--calibrate", action="store_true", help="subtract the noise mean of every sensor")
+    serve.add_argument("--profiles", dest="profilesPath",
+        help="json file with the noise calibration of every device (loaded on start, saved on exit)")
+
+    export = commands.add_parser("export", parents=[common], help="export a NN as float32/int8 model for gateways")
+    export.add_argument("model", help="path of the model file")
+    export.add_argument("output", help="path of the exported model file")
+    export.add_argument("--dtype", default="int8", choices=["float32", "int8"])
+    export.add_argument("--data", nargs="+", help="input files to calibrate and check the exported model with")
+    export.add_argument("--lookup-table", dest="useLookupTable", action="store_true",
+        help="check the accuracy with the lookup table sigmoid")
+
+    select = commands.add_parser("select", parents=[common],
+        help="search the best hyperparameters with stratified cross-validation")
+    select.add_argument("data", nargs="+", help="input files, directories or glob patterns")
+    select.add_argument("--hidden", type=int, nargs="+", default=[3], help="sizes of the hidden layer to try")
+    select.add_argument("--learning-rate", dest="learningRate", type=float, nargs="+", default=[0.01],
+        help="learning rates to try")
+    select.add_argument("--max-loss", dest="maxLossValue", type=float, nargs="+", default=[0.0225],
+        help="loss thresholds (maxLossValue) to try")
+    select.add_argument("--random", type=int,
+        help="try this many random combinations of the values instead of all combinations")
+    select.add_argument("--folds", type=int, default=5, help="k of the k-fold cross-validation")
+    select.add_argument("--validation", dest="validationFraction", type=float,
+        help="one stratified split with this validation fraction instead of the cross-validation")
+    select.add_argument("--activation", default="sigmoid", choices=HIDDEN_ACTIVATIONS,
+        help="activation of the hidden layer")
+    select.add_argument("--output", default="sigmoid", choices=["sigmoid", "softmax"])
+    select.add_argument("--bias", action="store_true", help="use bias vectors")
+    select.add_argument("--batch-size", dest="batchSize", type=int, default=64)
+    select.add_argument("--max-epochs", dest="maxEpochs", type=int, default=200)
+    select.add_argument("--patience", type=int, default=20)
+    select.add_argument("--seed", type=int, default=0, help="seed of the splits and the initial weights")
+    select.add_argument("--workers", dest="maxWorkers", type=int, help="processes of the search")
+    select.add_argument("--model", help="train a NN with the best parameters on all data and save it here")
+    select.add_argument("--report", help="write all results as json file")
+    select.add_argument("--no-cache", dest="useCache", action="store_false", help="don't use the dataset cache")
+    select.add_argument("--calibrate", action="store_true", help="subtract the noise mean from the data")
+
+    # all further arguments are passed to the benchmark (see src/Benchmark.py)
+    commands.add_parser("bench", help="run the benchmarks, e.g. bench --lines 100000 --baseline old.json")
+
+    return argumentParser
+
+def main(argv=None):
+    argumentParser = createArgumentParser()
+    (arguments, unknownArguments) = argumentParser.parse_known_args(argv)
+    if len(unknownArguments) > 0 and arguments.command != "bench":
+        argumentParser.error("unrecognized arguments: " + " ".join(unknownArguments))
+    logging.basicConfig(level=logging.WARNING if getattr(arguments, "quiet", False) else logging.INFO,
+        format="%(message)s")
+
+    if arguments.command is None:
+        return runInteractive()
+    elif arguments.command == "bench":
+        from src.Benchmark import main as runBenchmarks
+
+        return runBenchmarks(unknownArguments)
+
+    if len(arguments.metrics) > 0:
+        metrics.enable([createSink(sink) for sink in arguments.metrics],
+            interval=10 if arguments.command == "serve" else None)
+
+    try:
+        if arguments.command == "train":
+            start = time.perf_counter()
+            (model, history) = trainModel(arguments.data, arguments.model, arguments.hidden,
+                arguments.activation, arguments.output, arguments.bias, arguments.learningRate, arguments.batchSize,
+                arguments.maxEpochs, arguments.patience, arguments.maxLossValue, arguments.useCache,
+                arguments.calibrate, arguments.seed, verbose=not arguments.quiet, strict=arguments.strict,
+                checkpointPath=arguments.checkpointPath, checkpointInterval=arguments.checkpointInterval,
+                ensembleSize=arguments.ensembleSize, maxWorkers=arguments.maxWorkers, parallel=arguments.parallel,
+                threadsPerWorker=arguments.threadsPerWorker)
+            if arguments.ensembleSize > 1:
+                logging.getLogger("stepRecognition").info("Trained " + str(arguments.ensembleSize) + " NNs in "
+                    + str(round(time.perf_counter() - start, 2)) + " seconds, final losses: "
+                    + ", ".join(str(min(memberHistory)) for memberHistory in history)
+                    + ". The ensemble was saved as " + arguments.model + ".")
+            else:
+                if arguments.saveWeights:
+                    model.saveWeights()
+                logging.getLogger("stepRecognition").info("Trained through " + str(len(history)) + " epochs in "
+                    + str(round(time.perf_counter() - start, 2)) + " seconds, final loss: " + str(min(history))
+                    + ". The model was saved as " + arguments.model + ".")
+        elif arguments.command == "predict":
+            labels = predictFile(arguments.model, arguments.data, arguments.results, arguments.format,
+                arguments.useCache, arguments.calibrate, arguments.strict)
+            logging.getLogger("stepRecognition").info("Classified " + str(len(labels)) + " steps, the results were "
+                + "written to " + arguments.results + ".")
+        elif arguments.command == "export":
+            report = exportModel(arguments.model, arguments.output, arguments.dtype, arguments.data,
+                arguments.useLookupTable, arguments.strict)
+            logging.getLogger("stepRecognition").info("The model was exported as " + arguments.output + " ("
+                + arguments.dtype + ", " + str(os.path.getsize(arguments.output)) + " bytes).")
+            if report is not None:
+                logging.getLogger("stepRecognition").info("Accuracy report against the float64 model: "
+                    + ", ".join(name + " = " + format(value, ".6g") for (name, value) in report.items()))
+        elif arguments.command == "select":
+            runSelection(arguments)
+        elif arguments.command == "serve":
+            try:
+                serveModel(arguments.model, arguments.host, arguments.port, arguments.unixPath, arguments.serialPort,
+                    arguments.baudrate, arguments.batchSize, arguments.maxLatency, arguments.results,
+                    arguments.calibrate, arguments.profilesPath)
+            except KeyboardInterrupt:
+                pass
+    except (OSError, ValueError) as error:
+        logging.getLogger("stepRecognition").error("Error: " + str(error))
+        return 1
+    finally:
+        if metrics.enabled:
+            metrics.disable()   # flushes the sinks
+
+    return 0
+
+def runSelection(arguments):
+    from src.ModelSelection import parameterGrid, randomParameters, formatConfusionMatrix
+
+    space = {"hiddenSize": arguments.hidden, "learningRate": arguments.learningRate,
+        "maxLossValue": arguments.maxLossValue}
+    if arguments.random is not None:
+        candidates = randomParameters(space, arguments.random, arguments.seed)
+    else:
+        candidates = parameterGrid(space)
+
+    start = time.perf_counter()
+    results = selectModel(arguments.data, candidates, arguments.folds, arguments.validationFraction,
+        {"activation": arguments.activation, "output": arguments.output, "useBias": arguments.bias},
+        {"batchSize": arguments.batchSize, "maxEpochs": arguments.maxEpochs, "patience": arguments.patience},
+        arguments.maxWorkers, arguments.seed, arguments.model, arguments.useCache, arguments.calibrate,
+        arguments.strict)
+
+    logger = logging.getLogger("stepRecognition")
+    logger.info("Evaluated " + str(len(candidates)) + " candidates in " + str(round(time.perf_counter() - start, 2))
+        + " seconds (validation accuracy, mean +- std over the splits):")
+    for result in results:
+        logger.info("  " + format(result["accuracy"], ".4f") + " +- " + format(result["accuracyStd"], ".4f") + "  "
+            + ", ".join(name + " = " + str(value) for (name, value) in sorted(result["parameters"].items()))
+            + "  (" + format(result["epochs"], ".1f") + " epochs)")
+    logger.info("Confusion matrix of the best candidate (all validation splits):\n"
+        + formatConfusionMatrix(results[0]["confusionMatrix"]))
+    if arguments.model is not None:
+        logger.info("A NN with the best parameters was trained on all data and saved as " + arguments.model + ".")
+
+    if arguments.report is not None:
+        import json
+
+        with open(arguments.report, "w") as reportFile:
+            json.dump([dict(result, confusionMatrix=result["confusionMatrix"].tolist()) for result in results],
+                reportFile, indent=2)
+
+# ------------------------------------------------------------------------------
+# Usage of the NN (interactive)
+
+def runInteractive():
     # Initialize and run parser
     parser = Parser()
     #parser.askForAverageCalculation()           # Asks whether new average values should be calculated
@@ -193,11 +854,10 @@ if __name__ == "__main__":
         #inArray = NN.listenOnPort()
         #parser.processDataArray(inArray)
         parser.askForDestination()
-        parser.processData()
+        DatasetCache().processData(parser)      # parses only if the file isn't cached yet
          
-        # Retrieve parsed data as an array
-        parsedData = []
-        parsedData = parser.getDataArray()
+        # Retrieve parsed data as a columnar batch
+        parsedData = parser.getDataBatch()
          
         # Set X (input step data values) and y (input labels corresponding to the step data values)
         X = []
@@ -207,43 +867,37 @@ if __name__ == "__main__":
         # Start new training
         print("Training: Started ...\n", end=" ")
         t = time.process_time()
-        loss = 1.0      # initialize loss
-        trainingCounter = 0
         maxLossValue = 0.0225
-        while (loss > maxLossValue):    # train as long as the loss is greater than the maxLossValue
-            NN.train(X, y)
-            loss = np.mean(np.square(y - NN.feedForward(X)))    # mean sum squared loss
-             
-            if (trainingCounter % 10000) == 0:
-                print("# " + str(trainingCounter) + "\n")
-                print("Input (scaled): \n" + str(X))
-                print("Actual Output: \n" + str(y))
-                print("Predicted Output: \n" + str(NN.feedForward(X)))
-                print("Loss: \n" + str(loss))
-                print("\n")
-             
-            trainingCounter += 1
+        checkpointer = Checkpointer("checkpoint.nn")    # an interrupted training is resumed on the next start
+        fitArguments = {"batchSize": 64, "maxEpochs": 500, "patience": 25, "maxLossValue": maxLossValue, "verbose": True}
+        try:
+            history = NN.fit(X, y, optimizer=Adam(learningRate=0.01), checkpointer=checkpointer, **fitArguments)
+        except CheckpointMismatchError as error:
+            # the checkpoint belongs to the training of another file
+            print(str(error) + " A new training is started instead.")
+            checkpointer.remove()
+            history = NN.fit(X, y, optimizer=Adam(learningRate=0.01), checkpointer=checkpointer, **fitArguments)
+        loss = min(history)
              
         elapsedTime = float(int((time.process_time() - t) * 100)) / 100     # only 2 decimal positions
         print("DONE!\n", sep=' ', end="", flush=True)
         print("Time for training: " + str(elapsedTime) + " seconds.")
-        print("The neural net was trained through " + str(trainingCounter) + " runs.")
+        print("The neural net was trained through " + str(len(history)) + " epochs.")
          
         # Save the weight values in a text-file
         print("Save weights:", end=" ")
         NN.saveWeights()
+        NN.save("model.nn")
+        checkpointer.remove()
         print("DONE!\n", sep=' ', end="", flush=True)
         print("Final loss: " + str(loss) + "\n")
          
         # Get data which should be classified
         (XTemp, yTemp) = NN.getUnclassifiedDataToClassify(False, "");   # Interactive version of the getUnclassifiedDataToClassify() method
-        inForPrediction = np.array((XTemp), dtype=float)
-        inForPrediction /= np.amax(inForPrediction, axis=0)             # maximum of inForPrediction (our input data for the prediction)
+        inForPrediction = XTemp                                         # already scaled like the training data
          
         # Predict
-        result = []
-        for j in range(len(inForPrediction)):
-            result.append(NN.predictWithoutPrint(inForPrediction[j]))
+        result = NN.predictBatch(inForPrediction)
          
         # Save the resulting weights in a file
         NN.saveResults(result)
@@ -251,23 +905,25 @@ if __name__ == "__main__":
     elif (nnTraining == "no") or (nnTraining == "n"):
         # nothing to do
         print("Exiting the program!")
-        sys.exit(0)
+        return 0
     else:
         print("Your given answer (" + nnTraining + ") was not recognized. Exiting the program!")
-        sys.exit(0)
+        return 0
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
 
 #-------------------------------------------------------------------------------
 # NN usage without text and statistics:
 #     NN = NeuralNetwork()
 #     # Get data which should be classified
 #     (XTemp, yTemp) = NN.getUnclassifiedDataToClassify(False, "");   # Interactive version
-#     inForPrediction = np.array((XTemp), dtype=float)
-#     inForPrediction /= np.amax(inForPrediction, axis=0)             # maximum of inForPrediction (our input data for the prediction)
+#     inForPrediction = XTemp                                         # already scaled like the training data
 #      
 #     # Predict
-#     result = []
-#     for j in range(len(inForPrediction)):
-#         result.append(NN.predictWithoutPrint(inForPrediction[j]))
+#     result = NN.predictBatch(inForPrediction)
 #     #NN.predictWithPrint(inForPrediction)
 #      
 #     # Save results in a file
@@ -0,0 +1,344 @@
+# Metrics.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides the instrumentation of the project: counters, gauges,
+# latency histograms, series (e.g. the loss curve) and rate-limited events.
+# The values are exported by pluggable sinks (log, json file, Prometheus text
+# format on a local port). Metrics are disabled by default, then every call
+# returns right after checking one flag.
+#
+# Usage: from src.Metrics import metrics
+#        metrics.enable([createSink("prometheus:9100")], interval=10)
+
+import bisect
+import collections
+import json
+import logging
+import threading
+import time
+
+# upper bounds (in s) of the buckets of latency histograms
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+logger = logging.getLogger("stepRecognition")
+
+class Histogram(object):
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        # parameters
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)     # last bucket: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def getState(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+class NullTimer(object):
+    # returned by Metrics.timer if the metrics are disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class Timer(object):
+    def __init__(self, metrics, name):
+        # parameters
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class Metrics(object):
+    def __init__(self, eventInterval=1.0, eventBurst=5, seriesLength=1000):
+        # parameters
+        self.enabled = False
+        self.eventInterval = eventInterval  # time (in s) after which eventBurst events of one name are allowed again
+        self.eventBurst = eventBurst
+        self.seriesLength = seriesLength    # max. amount of values kept per series
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.series = {}
+        self.eventWindows = {}              # event name --> [window start, emitted, suppressed]
+        self.sinks = []
+        self.lock = threading.Lock()
+        self.flushThread = None
+        self.flushStop = threading.Event()
+
+    def enable(self, sinks=(), interval=None):
+        # interval: the sinks are flushed every interval seconds by a
+        # background thread (otherwise only on flush())
+        for sink in sinks:
+            self.addSink(sink)
+        self.enabled = True
+
+        if interval is not None and self.flushThread is None:
+            self.flushStop.clear()
+            self.flushThread = threading.Thread(target=self.runFlush, args=(interval,), daemon=True)
+            self.flushThread.start()
+
+        return self
+
+    def disable(self):
+        self.enabled = False
+        if self.flushThread is not None:
+            self.flushStop.set()
+            self.flushThread.join()
+            self.flushThread = None
+
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = []
+
+    def addSink(self, sink):
+        sink.attach(self)
+        self.sinks.append(sink)
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+            self.series = {}
+            self.eventWindows = {}
+
+    def increment(self, name, value=1):
+        if not self.enabled:
+            return None
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def setGauge(self, name, value):
+        if not self.enabled:
+            return None
+        self.gauges[name] = value
+
+    def observe(self, name, value):
+        # adds a value (e.g. a latency in s) to the histogram name
+        if not self.enabled:
+            return None
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(value)
+
+    def record(self, name, value):
+        # appends a value to the series name (e.g. the loss per epoch), the
+        # latest value is exported as gauge as well
+        if not self.enabled:
+            return None
+        with self.lock:
+            if name not in self.series:
+                self.series[name] = collections.deque(maxlen=self.seriesLength)
+            self.series[name].append(value)
+        self.gauges[name] = value
+
+    def timer(self, name):
+        # with metrics.timer("predict_latency_seconds"): ...
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name)
+
+    def event(self, name, message, level=logging.WARNING, **fields):
+        # Structured event (e.g. a skipped line). Events are logged even if the
+        # metrics are disabled, but only eventBurst events per name and
+        # eventInterval; the amount of suppressed events is reported with the
+        # next event, which passes.
+        now = time.monotonic()
+        with self.lock:
+            window = self.eventWindows.get(name)
+            if window is None or now - window[0] >= self.eventInterval:
+                suppressed = 0 if window is None else window[2]
+                window = [now, 0, 0]
+                self.eventWindows[name] = window
+            else:
+                suppressed = 0
+
+            if window[1] >= self.eventBurst:
+                window[2] += 1
+                return False
+            window[1] += 1
+
+        fields["event"] = name
+        if suppressed > 0:
+            fields["suppressed"] = suppressed
+            message += " (" + str(suppressed) + " similar events were suppressed)"
+
+        logger.log(level, message, extra={"fields": fields})
+        for sink in self.sinks:
+            sink.event(name, message, fields)
+
+        return True
+
+    def flush(self):
+        snapshot = self.getSnapshot()
+        for sink in self.sinks:
+            sink.write(snapshot)
+
+    def runFlush(self, interval):
+        while not self.flushStop.wait(interval):
+            self.flush()
+
+    # getter
+    def getCounter(self, name):
+        return self.counters.get(name, 0)
+
+    def getSnapshot(self):
+        with self.lock:
+            return {"time": time.time(), "counters": dict(self.counters), "gauges": dict(self.gauges),
+                "histograms": {name: histogram.getState() for (name, histogram) in self.histograms.items()},
+                "series": {name: list(values) for (name, values) in self.series.items()}}
+
+class MetricsSink(object):
+    # base class of all sinks, every method is optional
+    def attach(self, metrics):
+        pass
+
+    def write(self, snapshot):
+        pass
+
+    def event(self, name, message, fields):
+        pass
+
+    def close(self):
+        pass
+
+class LogSink(MetricsSink):
+    # logs a one-line summary of the counters and gauges on every flush
+    def __init__(self, level=logging.INFO):
+        # parameters
+        self.level = level
+
+    def write(self, snapshot):
+        values = dict(snapshot["counters"])
+        values.update(snapshot["gauges"])
+        for (name, histogram) in snapshot["histograms"].items():
+            if histogram["count"] > 0:
+                values[name + "_mean"] = histogram["sum"] / histogram["count"]
+        logger.log(self.level, "metrics: " + ", ".join(name + " = " + format(value, ".6g")
+            for (name, value) in sorted(values.items())))
+
+class JsonSink(MetricsSink):
+    # appends one json object per line: snapshots and events
+    def __init__(self, path="metrics.jsonl"):
+        # parameters
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a")
+
+    def write(self, snapshot):
+        self.writeLine(dict(snapshot, type="snapshot"))
+
+    def event(self, name, message, fields):
+        self.writeLine(dict(fields, type="event", time=time.time(), message=message))
+
+    def writeLine(self, item):
+        with self.lock:
+            if self.file is not None:
+                self.file.write(json.dumps(item) + "\n")
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+class PrometheusSink(MetricsSink):
+    # serves the current values in the Prometheus text format on
+    # http://host:port/metrics (rendered on every scrape)
+    def __init__(self, port=9100, host="127.0.0.1", prefix="stepnn_"):
+        # parameters
+        self.port = port
+        self.host = host
+        self.prefix = prefix
+        self.metrics = None
+        self.server = None
+        self.serverThread = None
+
+    def attach(self, metrics):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer   # only imported if needed
+
+        self.metrics = metrics
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return None
+
+                body = sink.render(sink.metrics.getSnapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *arguments):
+                pass    # no log line per scrape
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.server.server_address[1]   # port 0: a free port was chosen
+        self.serverThread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.serverThread.start()
+
+    def render(self, snapshot):
+        lines = []
+        for (name, value) in sorted(snapshot["counters"].items()):
+            lines.append("# TYPE " + self.prefix + name + " counter")
+            lines.append(self.prefix + name + " " + repr(float(value)))
+        for (name, value) in sorted(snapshot["gauges"].items()):
+            lines.append("# TYPE " + self.prefix + name + " gauge")
+            lines.append(self.prefix + name + " " + repr(float(value)))
+        for (name, histogram) in sorted(snapshot["histograms"].items()):
+            lines.append("# TYPE " + self.prefix + name + " histogram")
+            cumulativeCount = 0
+            for (bound, count) in zip(list(histogram["buckets"]) + ["+Inf"], histogram["counts"]):
+                cumulativeCount += count
+                lines.append(self.prefix + name + "_bucket{le=\"" + str(bound) + "\"} " + str(cumulativeCount))
+            lines.append(self.prefix + name + "_sum " + repr(float(histogram["sum"])))
+            lines.append(self.prefix + name + "_count " + str(histogram["count"]))
+
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+# Creates a sink from a short description: "log", "json:<path>" or
+# "prometheus:<port>" (resp. "prometheus:<host>:<port>")
+def createSink(description):
+    (kind, separator, argument) = description.partition(":")
+    if kind == "log":
+        return LogSink()
+    elif kind == "json":
+        return JsonSink(argument or "metrics.jsonl")
+    elif kind == "prometheus":
+        (host, separator, port) = argument.rpartition(":")
+        return PrometheusSink(int(port or 9100), host or "127.0.0.1")
+
+    raise ValueError("The metrics sink \"" + description + "\" is not supported.")
+
+# registry used by the whole project
+metrics = Metrics()
@@ -0,0 +1,75 @@
+# ModelFile.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides the binary file format used to store trained models.
+# A file consists of a fixed start ("magic" + format version + header size),
+# a json header describing the stored values and the raw arrays, which are
+# aligned to 64 bytes so they can be memory-mapped directly
+#
+#   | b"STEPNN\0\0" | version (uint32) | header size (uint32) | json header | arrays |
+
+import json
+import os
+import struct
+import numpy as np
+
+MAGIC = b"STEPNN\0\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+def writeModelFile(path, header, arrays):
+    # header: json serializable dict, arrays: name --> numpy array
+    arrayInfos = {}
+    offset = 0
+    for (name, array) in arrays.items():
+        array = np.asarray(array)
+        arrayInfos[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = alignOffset(offset + array.nbytes)
+
+    header = dict(header, arrays=arrayInfos)
+    headerBytes = json.dumps(header).encode("utf-8")
+    start = alignOffset(len(MAGIC) + 8 + len(headerBytes))
+
+    # write into a temporary file first, so readers never see half a model
+    temporaryPath = str(path) + ".tmp"
+    with open(temporaryPath, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<II", FORMAT_VERSION, len(headerBytes)))
+        file.write(headerBytes)
+        for (name, array) in arrays.items():
+            file.write(b"\0" * (start + arrayInfos[name]["offset"] - file.tell()))
+            file.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temporaryPath, path)
+
+def readModelFile(path, mmap=True):
+    # returns (header, arrays). With mmap the arrays are copy-on-write views of
+    # the file, so loading costs (almost) nothing and the file is never changed
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("The file \"" + str(path) + "\" is no model file.")
+
+        (version, headerSize) = struct.unpack("<II", file.read(8))
+        if version > FORMAT_VERSION:
+            raise ValueError("The model file \"" + str(path) + "\" has the format version " + str(version)
+                + ", but only versions up to " + str(FORMAT_VERSION) + " are supported.")
+
+        header = json.loads(file.read(headerSize).decode("utf-8"))
+        start = alignOffset(len(MAGIC) + 8 + headerSize)
+
+        arrays = {}
+        for (name, info) in header.pop("arrays").items():
+            dtype = np.dtype(info["dtype"])
+            shape = tuple(info["shape"])
+            if mmap and int(np.prod(shape)) > 0:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="c", offset=start + info["offset"], shape=shape)
+            else:
+                file.seek(start + info["offset"])
+                arrays[name] = np.fromfile(file, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    header["version"] = version
+    return (header, arrays)
+
+def alignOffset(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
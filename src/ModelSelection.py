@@ -0,0 +1,257 @@
+# ModelSelection.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides the evaluation and tuning of the neural network:
+# stratified train/validation splits, k-fold cross-validation, accuracy and
+# confusion matrices and a grid/random search over the hyperparameters. The
+# candidates are evaluated in parallel worker processes, which read the
+# dataset from shared memory (see SharedArrays.py).
+#
+# Usage: selection = ModelSelection(folds=5)
+#        results = selection.search(batch, parameterGrid({"hiddenSize": [3, 6], "learningRate": [0.01, 0.001]}))
+
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.MachineLearning import NeuralNetwork
+from src.Optimizer import Adam
+from src.Parser import LABELS
+from src.StepBatch import StepBatch
+from src.SharedArrays import shareArray, attachSharedArray, releaseSharedArray
+from src.ParallelTrainer import limitedThreads
+
+# arguments of NeuralNetwork and of NeuralNetwork.fit, which can be searched
+# (besides hiddenSize and learningRate)
+NETWORK_PARAMETERS = ("hiddenSizes", "activation", "output", "useBias")
+FIT_PARAMETERS = ("batchSize", "maxEpochs", "patience", "minDelta", "maxLossValue")
+
+# Splits the indices of every label in the same ratio, so training and
+# validation data contain the labels in the same proportions
+def stratifiedSplit(labels, validationFraction=0.2, seed=None):
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    trainIndices = []
+    validationIndices = []
+    for label in np.unique(labels):
+        indices = rng.permutation(np.flatnonzero(labels == label))
+        validationCount = int(round(len(indices) * validationFraction))
+        validationIndices.append(indices[:validationCount])
+        trainIndices.append(indices[validationCount:])
+
+    return (np.sort(np.concatenate(trainIndices)), np.sort(np.concatenate(validationIndices)))
+
+# Returns (train indices, validation indices) of every fold; the indices of
+# every label are distributed round-robin over the folds
+def stratifiedKFold(labels, folds=5, seed=None):
+    if folds < 2:
+        raise ValueError("At least 2 folds are needed for cross-validation, not " + str(folds) + ".")
+
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    foldOfSample = np.empty(len(labels), dtype=np.intp)
+    for label in np.unique(labels):
+        indices = rng.permutation(np.flatnonzero(labels == label))
+        foldOfSample[indices] = (np.arange(len(indices)) + rng.integers(folds)) % folds
+
+    return [(np.flatnonzero(foldOfSample != fold), np.flatnonzero(foldOfSample == fold)) for fold in range(folds)]
+
+# Rows: true labels, columns: predicted labels
+def confusionMatrix(trueLabels, predictedLabels, labelCount=len(LABELS)):
+    trueLabels = np.asarray(trueLabels, dtype=np.intp).ravel()
+    predictedLabels = np.asarray(predictedLabels, dtype=np.intp).ravel()
+    return np.bincount(trueLabels * labelCount + predictedLabels, minlength=labelCount * labelCount).reshape(
+        labelCount, labelCount)
+
+def accuracyScore(trueLabels, predictedLabels):
+    trueLabels = np.asarray(trueLabels).ravel()
+    return float(np.mean(trueLabels == np.asarray(predictedLabels).ravel())) if len(trueLabels) > 0 else 0.0
+
+# Table of a confusion matrix with the label names of the Parser
+def formatConfusionMatrix(matrix):
+    names = sorted(LABELS, key=LABELS.get)
+    width = max(max(len(name) for name in names), len(str(np.max(matrix, initial=0))))
+    lines = [" " * width + " | " + " ".join(name.rjust(width) for name in names) + "   (predicted)"]
+    for (name, row) in zip(names, matrix):
+        lines.append(name.rjust(width) + " | " + " ".join(str(count).rjust(width) for count in row))
+
+    return "\n".join(lines)
+
+# All combinations of the values of grid (name --> list of values)
+def parameterGrid(grid):
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+# count random candidates of space (name --> list of values to choose from or
+# function, which draws a value from a numpy Generator), e.g.
+# {"hiddenSize": [3, 6, 9], "learningRate": lambda rng: 10 ** rng.uniform(-4, -1)}
+def randomParameters(space, count, seed=None):
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for i in range(count):
+        candidate = {}
+        for name in sorted(space):
+            values = space[name]
+            if callable(values):
+                candidate[name] = values(rng)
+            else:
+                candidate[name] = values[rng.integers(len(values))]
+            if isinstance(candidate[name], np.generic):
+                candidate[name] = candidate[name].item()     # json serializable
+        candidates.append(candidate)
+
+    return candidates
+
+class ModelSelection(object):
+    def __init__(self, folds=5, validationFraction=None, maxWorkers=None, threadsPerWorker=1, seed=0,
+            config=None, fitArguments=None):
+        # parameters
+        self.folds = folds                          # k of the k-fold cross-validation
+        self.validationFraction = validationFraction    # if given: one stratified split instead of k folds
+        self.maxWorkers = maxWorkers                # None: one worker per core
+        self.threadsPerWorker = threadsPerWorker    # BLAS threads of every worker process
+        self.seed = seed                            # splits, initial weights and mini-batches
+        self.config = {} if config is None else dict(config)    # fixed arguments of NeuralNetwork
+        self.fitArguments = {"batchSize": 64, "maxEpochs": 200, "patience": 20}
+        self.fitArguments.update({} if fitArguments is None else fitArguments)
+        self.results = []
+
+    # Evaluates every candidate (dict of hiddenSize, learningRate, maxLossValue
+    # and any other argument of NeuralNetwork or fit) on all folds. batch is a
+    # StepBatch (or a tuple of values and labels). Returns the results sorted by
+    # the mean validation accuracy.
+    def search(self, batch, candidates):
+        (values, labels) = getValuesAndLabels(batch)
+        candidates = list(candidates)
+        splits = 1 if self.validationFraction is not None else self.folds
+        tasks = [(candidate, split) for candidate in candidates for split in range(splits)]
+
+        blocks = []
+        try:
+            (block, sharedValues, descriptorValues) = shareArray(values)
+            blocks.append(block)
+            (block, sharedLabels, descriptorLabels) = shareArray(labels)
+            blocks.append(block)
+
+            arguments = (descriptorValues, descriptorLabels, self.folds, self.validationFraction, self.seed,
+                self.config, self.fitArguments)
+            if self.maxWorkers == 1 or len(tasks) == 1:
+                scores = [evaluateCandidate(*arguments, candidate, split) for (candidate, split) in tasks]
+            else:
+                context = multiprocessing.get_context("spawn")
+                with limitedThreads(self.threadsPerWorker):
+                    with ProcessPoolExecutor(max_workers=self.maxWorkers or os.cpu_count(),
+                            mp_context=context) as executor:
+                        futures = [executor.submit(evaluateCandidate, *arguments, candidate, split)
+                            for (candidate, split) in tasks]
+                        scores = [future.result() for future in futures]
+        finally:
+            sharedValues = sharedLabels = None
+            for block in blocks:
+                releaseSharedArray(block)
+
+        # combine the folds of every candidate
+        self.results = []
+        for (i, candidate) in enumerate(candidates):
+            candidateScores = scores[i * splits:(i + 1) * splits]
+            accuracies = [score["accuracy"] for score in candidateScores]
+            self.results.append({"parameters": candidate, "accuracy": float(np.mean(accuracies)),
+                "accuracyStd": float(np.std(accuracies)), "foldAccuracies": accuracies,
+                "confusionMatrix": np.sum([score["confusionMatrix"] for score in candidateScores], axis=0),
+                "epochs": float(np.mean([score["epochs"] for score in candidateScores]))})
+        self.results.sort(key=lambda result: -result["accuracy"])
+
+        return self.results
+
+    # Trains a NN with the best parameters of the last search on the whole batch
+    def fitBest(self, batch):
+        if len(self.results) == 0:
+            raise ValueError("No search has been run yet.")
+
+        (values, labels) = getValuesAndLabels(batch)
+        np.random.seed(self.seed)
+        (neuralNetwork, optimizer, fitArguments) = createCandidate(self.results[0]["parameters"], self.config,
+            self.fitArguments)
+        (X, y) = neuralNetwork.setInputForClassificationScaled(createBatch(values, labels))
+        neuralNetwork.fit(X, y, optimizer, **fitArguments)
+
+        return neuralNetwork
+
+    # getter
+    def getResults(self):
+        return self.results
+
+    def getBestParameters(self):
+        return self.results[0]["parameters"] if len(self.results) > 0 else None
+
+# Evaluates a trained NN on a batch with known labels
+def evaluate(neuralNetwork, batch):
+    (X, y) = neuralNetwork.setInputForClassificationScaled(batch, fitScaler=False)
+    predictedLabels = neuralNetwork.outputToLabels(neuralNetwork.predictBatch(X))
+    labels = batch.getLabels()
+
+    return {"accuracy": accuracyScore(labels, predictedLabels), "confusionMatrix": confusionMatrix(labels, predictedLabels)}
+
+# Returns the NN, the optimizer and the fit arguments of a candidate
+def createCandidate(parameters, config, fitArguments):
+    config = dict(config)
+    fitArguments = dict(fitArguments)
+    learningRate = 0.01
+    for (name, value) in parameters.items():
+        if name == "hiddenSize":
+            config["hiddenSizes"] = (value,)
+        elif name == "learningRate":
+            learningRate = value
+        elif name in NETWORK_PARAMETERS:
+            config[name] = value
+        elif name in FIT_PARAMETERS:
+            fitArguments[name] = value
+        else:
+            raise ValueError("The hyperparameter \"" + str(name) + "\" is not supported.")
+
+    return (NeuralNetwork(**config), Adam(learningRate=learningRate), fitArguments)
+
+def getValuesAndLabels(batch):
+    if isinstance(batch, StepBatch):
+        return (batch.getInput(), batch.getLabels())
+    return (np.asarray(batch[0]), np.asarray(batch[1]))
+
+def createBatch(values, labels):
+    batch = StepBatch(0, values.shape[1])
+    batch.setArrays(values, labels)
+    return batch
+
+# Runs in the worker processes: trains one candidate on the training part of
+# a split and evaluates it on the validation part. The splits are computed
+# again from the shared labels, so only the split number is sent.
+def evaluateCandidate(descriptorValues, descriptorLabels, folds, validationFraction, seed, config, fitArguments,
+        candidate, split):
+    blocks = []
+    try:
+        (block, values) = attachSharedArray(descriptorValues)
+        blocks.append(block)
+        (block, labels) = attachSharedArray(descriptorLabels)
+        blocks.append(block)
+
+        if validationFraction is not None:
+            (trainIndices, validationIndices) = stratifiedSplit(labels, validationFraction, seed)
+        else:
+            (trainIndices, validationIndices) = stratifiedKFold(labels, folds, seed)[split]
+
+        np.random.seed([seed, split])   # same initial weights for all candidates of a split
+        (neuralNetwork, optimizer, candidateFitArguments) = createCandidate(candidate, config, fitArguments)
+
+        # the scaler is fitted on the training part only
+        (X, y) = neuralNetwork.setInputForClassificationScaled(createBatch(values[trainIndices], labels[trainIndices]))
+        history = neuralNetwork.fit(X, y, optimizer, **candidateFitArguments)
+
+        score = evaluate(neuralNetwork, createBatch(values[validationIndices], labels[validationIndices]))
+        score["epochs"] = len(history)
+        return score
+    finally:
+        values = labels = None
+        for block in blocks:
+            releaseSharedArray(block, unlink=False)
@@ -0,0 +1,69 @@
+# Optimizer.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides the update rules for the weights of the neural network.
+# The parameters are updated in place, gradients are the gradients of the loss
+# (so the optimizers step into the opposite direction)
+
+import numpy as np
+
+class SGD(object):
+    def __init__(self, learningRate=0.1, momentum=0.9):
+        # parameters
+        self.learningRate = learningRate
+        self.momentum = momentum
+        self.velocities = None
+
+    def update(self, parameters, gradients):
+        if self.velocities is None:
+            self.velocities = [np.zeros_like(parameter) for parameter in parameters]
+
+        for (parameter, gradient, velocity) in zip(parameters, gradients, self.velocities):
+            velocity *= self.momentum
+            velocity -= self.learningRate * gradient
+            parameter += velocity
+
+    # state for checkpoints: the arrays are stored as lists (None before the first update)
+    def getState(self):
+        return {"velocities": self.velocities}
+
+    def setState(self, state):
+        self.velocities = None if state["velocities"] is None else [np.array(velocity) for velocity in state["velocities"]]
+
+class Adam(object):
+    def __init__(self, learningRate=0.01, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        # parameters
+        self.learningRate = learningRate
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.stepCtr = 0
+        self.moments = None
+        self.velocities = None
+
+    def update(self, parameters, gradients):
+        if self.moments is None:
+            self.moments = [np.zeros_like(parameter) for parameter in parameters]
+            self.velocities = [np.zeros_like(parameter) for parameter in parameters]
+
+        self.stepCtr += 1
+        # bias correction of the first and second moment estimates
+        stepSize = self.learningRate * np.sqrt(1 - self.beta2 ** self.stepCtr) / (1 - self.beta1 ** self.stepCtr)
+
+        for (parameter, gradient, moment, velocity) in zip(parameters, gradients, self.moments, self.velocities):
+            moment *= self.beta1
+            moment += (1 - self.beta1) * gradient
+            velocity *= self.beta2
+            velocity += (1 - self.beta2) * np.square(gradient)
+            parameter -= stepSize * moment / (np.sqrt(velocity) + self.epsilon)
+
+    # see SGD.getState
+    def getState(self):
+        return {"stepCtr": self.stepCtr, "moments": self.moments, "velocities": self.velocities}
+
+    def setState(self, state):
+        self.stepCtr = state["stepCtr"]
+        self.moments = None if state["moments"] is None else [np.array(moment) for moment in state["moments"]]
+        self.velocities = None if state["velocities"] is None else [np.array(velocity) for velocity in state["velocities"]]
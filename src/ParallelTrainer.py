@@ -0,0 +1,204 @@
+# ParallelTrainer.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides data-parallel training on several cores. The dataset and
+# the weights live in shared memory and every worker process trains on its own
+# shard of the dataset:
+#   - "sync":    the workers compute the gradients of one mini-batch each, the
+#                main process averages them and updates the weights
+#   - "hogwild": the workers update the shared weights directly without locks
+
+import contextlib
+import multiprocessing
+import os
+import threading
+import numpy as np
+from src.MachineLearning import NeuralNetwork
+from src.Optimizer import SGD
+from src.SharedArrays import createSharedArray, shareArray, attachSharedArray, releaseSharedArray
+
+# commands of the control array
+RUN = 0
+STOP = 1
+
+class ParallelTrainer(object):
+    def __init__(self, neuralNetwork, workers=None, mode="sync", threadsPerWorker=1, seed=None):
+        if mode not in ("sync", "hogwild"):
+            raise ValueError("The training mode \"" + str(mode) + "\" is not supported (sync or hogwild).")
+
+        # parameters
+        self.neuralNetwork = neuralNetwork
+        self.workers = workers or os.cpu_count()
+        self.mode = mode
+        self.threadsPerWorker = threadsPerWorker    # BLAS threads of every worker process
+        self.seed = np.random.randint(2 ** 31) if seed is None else seed
+        self.optimizer = None
+        self.barrier = None
+        self.control = None
+        self.parameters = None
+        self.gradients = None
+        self.meanGradient = None
+        self.meanGradients = None
+        self.steps = 0
+
+    # Same arguments and result as NeuralNetwork.fit. batchSize is the batch
+    # size of every worker.
+    def fit(self, X, y, optimizer=None, batchSize=32, **fitArguments):
+        self.optimizer = SGD() if optimizer is None else optimizer
+        shapes = [np.shape(parameter) for parameter in self.neuralNetwork.getParameters()]
+        sizes = [int(np.prod(shape)) for shape in shapes]
+        shardSize = -(-len(X) // self.workers)     # np.array_split: the first shards are one row larger
+        self.steps = max(-(-shardSize // batchSize), 1)
+        self.meanGradient = np.empty(sum(sizes))
+        self.meanGradients = splitParameters(self.meanGradient, shapes)
+
+        blocks = []
+        processes = []
+        context = multiprocessing.get_context("spawn")
+        try:
+            # dataset, weights, gradients and control values in shared memory
+            (block, sharedX, descriptorX) = shareArray(X)
+            blocks.append(block)
+            (block, sharedY, descriptorY) = shareArray(y)
+            blocks.append(block)
+            (block, self.parameters, parameterDescriptor) = createSharedArray(sum(sizes))
+            blocks.append(block)
+            (block, self.gradients, gradientDescriptor) = createSharedArray((self.workers, sum(sizes)))
+            blocks.append(block)
+            (block, self.control, controlDescriptor) = createSharedArray(3, np.int64)
+            blocks.append(block)
+
+            # the network of the main process works on the shared weights
+            parameterViews = splitParameters(self.parameters, shapes)
+            for (view, parameter) in zip(parameterViews, self.neuralNetwork.getParameters()):
+                view[...] = parameter
+            self.neuralNetwork.setParameters(parameterViews)
+
+            self.barrier = context.Barrier(self.workers + 1)
+            with limitedThreads(self.threadsPerWorker):
+                for workerId in range(self.workers):
+                    process = context.Process(target=runWorker, daemon=True, args=(workerId, self.workers,
+                        self.neuralNetwork.getConfig(), self.mode, self.optimizer, batchSize, self.seed,
+                        descriptorX, descriptorY, parameterDescriptor, gradientDescriptor, controlDescriptor,
+                        self.barrier))
+                    process.start()
+                    processes.append(process)
+
+            history = self.neuralNetwork.fit(X, y, self.optimizer, batchSize, trainEpoch=self.trainEpoch,
+                **fitArguments)
+
+            self.control[0] = STOP
+            self.barrier.wait()
+            for process in processes:
+                process.join()
+        except threading.BrokenBarrierError:
+            raise RuntimeError("A training worker process failed, see its error output.")
+        finally:
+            # the network gets its own copy of the trained weights back
+            self.neuralNetwork.setParameters([np.array(parameter) for parameter in self.neuralNetwork.getParameters()])
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+            sharedX = sharedY = parameterViews = None
+            self.parameters = self.gradients = self.control = self.barrier = None
+            for block in blocks:
+                releaseSharedArray(block)
+
+        return history
+
+    def trainEpoch(self, epoch):
+        self.control[:] = [RUN, epoch, self.steps]
+        self.barrier.wait()     # start of the epoch
+
+        if self.mode == "sync":
+            for step in range(self.steps):
+                self.barrier.wait()     # gradients of all workers are available
+                np.mean(self.gradients, axis=0, out=self.meanGradient)
+                self.optimizer.update(self.neuralNetwork.getParameters(), self.meanGradients)
+                self.barrier.wait()     # weights are updated
+
+        self.barrier.wait()     # end of the epoch
+
+# Stores the gradients of the worker in its row of the shared gradient array
+# instead of updating the weights
+class GradientCollector(object):
+    def __init__(self, gradientRow, shapes):
+        self.gradients = splitParameters(gradientRow, shapes)
+
+    def update(self, parameters, gradients):
+        for (target, gradient) in zip(self.gradients, gradients):
+            target[...] = gradient
+
+def runWorker(workerId, workers, config, mode, optimizer, batchSize, seed,
+        descriptorX, descriptorY, parameterDescriptor, gradientDescriptor, controlDescriptor, barrier):
+    blocks = []
+    try:
+        (block, X) = attachSharedArray(descriptorX)
+        blocks.append(block)
+        (block, y) = attachSharedArray(descriptorY)
+        blocks.append(block)
+        (block, parameters) = attachSharedArray(parameterDescriptor)
+        blocks.append(block)
+        (block, gradients) = attachSharedArray(gradientDescriptor)
+        blocks.append(block)
+        (block, control) = attachSharedArray(controlDescriptor)
+        blocks.append(block)
+
+        neuralNetwork = NeuralNetwork(**config)
+        shapes = [np.shape(parameter) for parameter in neuralNetwork.getParameters()]
+        neuralNetwork.setParameters(splitParameters(parameters, shapes))
+        if mode == "sync":
+            optimizer = GradientCollector(gradients[workerId], shapes)
+
+        shard = np.array_split(np.arange(len(X)), workers)[workerId]
+        while True:
+            barrier.wait()      # start of the epoch
+            if control[0] == STOP:
+                break
+
+            (epoch, steps) = (int(control[1]), int(control[2]))
+            order = np.random.default_rng([seed, epoch, workerId]).permutation(shard)
+            for step in range(steps):
+                indices = np.sort(order[step * batchSize:(step + 1) * batchSize])
+                neuralNetwork.train(X[indices], y[indices], optimizer)
+                if mode == "sync":
+                    barrier.wait()  # gradients are available
+                    barrier.wait()  # weights are updated
+
+            barrier.wait()      # end of the epoch
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        X = y = parameters = gradients = control = neuralNetwork = optimizer = None
+        for block in blocks:
+            releaseSharedArray(block, unlink=False)
+
+# Splits a flat array into views with the given shapes
+def splitParameters(flatArray, shapes):
+    views = []
+    offset = 0
+    for shape in shapes:
+        size = int(np.prod(shape))
+        views.append(flatArray[offset:offset + size].reshape(shape))
+        offset += size
+
+    return views
+
+# Limits the BLAS threads of the worker processes started inside the block
+@contextlib.contextmanager
+def limitedThreads(threads):
+    names = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+    previous = {name: os.environ.get(name) for name in names}
+    os.environ.update({name: str(threads) for name in names})
+    try:
+        yield
+    finally:
+        for (name, value) in previous.items():
+            if value is None:
+                del os.environ[name]
+            else:
+                os.environ[name] = value
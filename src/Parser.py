@@ -1,20 +1,119 @@
 # Parser.py
 # Author: Armin Müller
 # Created on 01.11.2018
-# Last Modified on: 17.04.2019
+# Last Modified on: 18.10.2026
 #
 # This file provides a parser to extract the data out of input files for
 # the step-recognition-NN-project
 
+import os
+import re
+import time
+from src.Metrics import metrics
 from src.StepData import StepData
+from src.StepBatch import StepBatch
+from src.Calibration import NoiseCalibration
+
+# supported labels and their numeric representation
+LABELS = {"labelPlaceholder": 0, "noMove": 1, "slowWalk": 2}
+
+# acceleration values of a step (3 measurements of the x, y and z axes)
+STEP_VALUES = 9
+
+# matches the value of every "x-Axes", "y-Axes" and "z-Axes" key of a line
+AXES_PATTERN = re.compile(r'"[xyz]-Axes":([^,;}]*)')
+
+# Raised for a line, which can't be parsed. reason is a short keyword
+# ("start", "end", "brackets", "label", "acceleration", "values", "noise"),
+# which is used to count the errors in lenient mode
+class ParseError(ValueError):
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+    def __reduce__(self):
+        # pickled with both arguments, so a worker process (BulkParser) can
+        # pass the error back
+        return (ParseError, (self.reason, str(self)))
+
+# Counts the lines, which couldn't be parsed, per reason and keeps the line
+# numbers of the first sampleSize lines of every reason
+class ParseErrors(object):
+    def __init__(self, sampleSize=10):
+        # parameters
+        self.sampleSize = sampleSize
+        self.counts = {}        # reason --> amount of lines
+        self.samples = {}       # reason --> line numbers (or "path:line" after merging several files)
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def add(self, reason, lineNumber):
+        self.counts[reason] = self.counts.get(reason, 0) + 1
+        samples = self.samples.setdefault(reason, [])
+        if len(samples) < self.sampleSize:
+            samples.append(lineNumber)
+
+    def merge(self, other, lineOffset=0, source=None):
+        # adds the errors of another parser, whose line numbers start after
+        # lineOffset (e.g. a later chunk of the same file)
+        for (reason, count) in other.counts.items():
+            self.counts[reason] = self.counts.get(reason, 0) + count
+            samples = self.samples.setdefault(reason, [])
+            for lineNumber in other.samples.get(reason, []):
+                if len(samples) < self.sampleSize:
+                    if isinstance(lineNumber, int):
+                        lineNumber += lineOffset
+                        if source is not None:
+                            lineNumber = source + ":" + str(lineNumber)
+                    samples.append(lineNumber)
+
+        return self
+
+    def getSummary(self):
+        return ", ".join(reason + ": " + str(count) + " (first lines: " + ", ".join(str(lineNumber)
+            for lineNumber in self.samples.get(reason, [])) + ")" for (reason, count) in sorted(self.counts.items()))
+
+    # getter
+    def getCounts(self):
+        return self.counts
+
+    def getSamples(self):
+        return self.samples
+
+    def getState(self):
+        return {"counts": self.counts, "samples": self.samples}
+
+    # setter
+    def setState(self, state):
+        self.counts = dict(state["counts"])
+        self.samples = {reason: list(samples) for (reason, samples) in state["samples"].items()}
+
+def createLineCounts():
+    return {"parsed": 0, "noise": 0, "skipped": 0, "failed": 0}
+
+# Adds line counts (see Parser.lineCounts) to the parser_lines_*_total counters
+def recordLineCounts(lineCounts):
+    if metrics.enabled:
+        for (name, count) in lineCounts.items():
+            metrics.increment("parser_lines_" + name + "_total", count)
 
 class Parser(object):
-    def __init__(self):
+    def __init__(self, strict=True):
         # parameters
         self.destination = ""
         self.data = []
+        self.batch = StepBatch()
         self.lineCtr = 1
         self.average = [0.0, 0.0, 0.0]
+        self.calibration = NoiseCalibration()   # mean/variance of the noise lines
+        self.keepCalibration = False            # True: calibration is a profile (see setCalibration), which isn't reset
+        self.applyCalibration = False           # subtract the noise mean from the parsed batch
+        self.strict = strict                    # strict: invalid lines raise a ParseError, otherwise they're counted
+        self.errors = ParseErrors()             # invalid lines (lenient mode) and lines of wrong length
+        self.readLineCtr = 0                    # lines read (incl. empty and invalid lines)
+        self.lineCounts = createLineCounts()    # parsed/noise/skipped/failed lines (for the metrics)
+        self.recordMetrics = True               # False: the caller records lineCounts (e.g. BulkParser)
 
     def askForDestination(self):
         self.destination = input("Type in the destination of the file, which should be parsed:\n")
@@ -26,10 +125,9 @@ class Parser(object):
             # calculate the average for noise reduction
             self.askForDestination()
             self.processData()
-            for i in range(len(self.average)):
-                self.average[i] /= 3 * self.lineCtr
+            self.average = self.calibration.getMean().tolist()
 
-            print("The average values are: x = " + str(self.average[0]) + ", y = " + str(self.average[1]) + ", z = " + str(self.average[2]) + ". They were calculated over " + str(self.lineCtr) + " datasets.\n")
+            print("The average values are: x = " + str(self.average[0]) + ", y = " + str(self.average[1]) + ", z = " + str(self.average[2]) + ". They were calculated over " + str(self.calibration.count) + " noise samples.\n")
             
         elif (result == "no") or (result == "n"):
             # nothing to do
@@ -43,66 +141,162 @@ class Parser(object):
     def processData(self):
         # Reset processed data array
         self.data = []
-        
+        self.lineCtr = 1    # reset line counter
+        self.resetErrors()
+        self.resetCalibration()
+
+        start = time.perf_counter()
+        for stepData in self.iterData():
+            self.data.append(stepData)
+        self.recordParseTime(start)
+
+    # Lazily parses the file at self.destination and yields one StepData object
+    # per valid line, so the whole capture never has to be held in memory
+    def iterData(self):
         with open(self.destination, "r") as file:
-            data = file.readlines()
-            self.lineCtr = 1    # reset line counter
-
-            for line in data:
-                # if line is empty: skip it
-                lineWithoutSpacesAndLineFeeds = line.replace(" ", "").rstrip()
-                if len(lineWithoutSpacesAndLineFeeds) == 0:
-                    continue
-
-                if line.find("noise") > -1:
-                    # for noise reduction purposes
-                    self.processNoiseDataLine(line.replace(" ", "").rstrip())
-                    self.lineCtr += 1
-                elif len(line) < 230 or len(line) > 250:
-                    # line too short/long, skip it
-                    print("Couldn't parse line " + str(line) + " of the input file. It was skipped.")
-                    continue
-                else:
-                    # normal data processing
-                    stepData = StepData()   # create new step data object
+            yield from self.iterLines(file)
+
+    # Same as processData, but fills a columnar StepBatch instead of a list of
+    # StepData objects
+    def processDataBatch(self):
+        # Reset processed data batch (~240 bytes per line)
+        self.batch = StepBatch(os.path.getsize(self.destination) // 240)
+        self.lineCtr = 1    # reset line counter
+        self.resetErrors()
+        self.resetCalibration()
+
+        start = time.perf_counter()
+        with open(self.destination, "r") as file:
+            self.fillBatch(file)
+        self.calibrateBatch()
+        self.recordParseTime(start)
+
+    def recordParseTime(self, start):
+        if metrics.enabled:
+            seconds = time.perf_counter() - start
+            size = os.path.getsize(self.destination)
+            metrics.increment("parser_seconds_total", seconds)
+            metrics.increment("parser_bytes_total", size)
+            if size > 0:
+                metrics.setGauge("parser_seconds_per_megabyte", seconds / (size / 1e6))
 
-                    self.processLine(line.replace(" ", "").rstrip(), stepData)  # Delete whitespaces
-                    self.data.append(stepData)
-                    self.lineCtr += 1
-                    
     # If the data is gathered through listening on a port, use this method
     def processDataArray(self, rawDataArray):
         # Reset processed data array
         self.data = []
-        
-        for line in rawDataArray:
-            # if line is empty: skip it
-            lineWithoutSpacesAndLineFeeds = line.replace(" ", "").rstrip()
-            if len(lineWithoutSpacesAndLineFeeds) == 0:
-                continue
-
-            # for noise reduction purposes
-            if line.find("noise") > -1:
-                self.processNoiseDataLine(line.replace(" ", "").rstrip())
-                self.lineCtr += 1
-            elif len(line) < 230 or len(line) > 250:
-                # line too short/long, skip it
-                print("Couldn't parse line " + str(line) + " of the input file. It was skipped.")
-                continue
-            else:
-                # normal data processing
-                stepData = StepData()   # create new step data object
+        self.resetErrors()
+
+        for stepData in self.iterLines(rawDataArray):
+            self.data.append(stepData)
+
+    def processDataArrayBatch(self, rawDataArray):
+        # Reset processed data batch
+        self.batch = StepBatch()
+        self.resetErrors()
+        self.fillBatch(rawDataArray)
+        self.calibrateBatch()
+
+    def resetErrors(self):
+        self.errors = ParseErrors(self.errors.sampleSize)
+        self.readLineCtr = 0
+        self.lineCounts = createLineCounts()
+
+    def resetCalibration(self):
+        # the noise of the file only; a profile keeps the noise of earlier data
+        if not self.keepCalibration:
+            self.average = [0.0, 0.0, 0.0]
+            self.calibration = NoiseCalibration()
+
+    def fillBatch(self, lines):
+        # one scratch object is reused for all lines, the rows are converted
+        # into the batch in blocks (much faster than row by row)
+        rows = []
+        labels = []
+        for stepData in self.iterLines(lines, StepData()):
+            rows.append(stepData.accelerationData)
+            labels.append(stepData.label)
+            if len(rows) == 4096:
+                self.batch.appendRows(rows, labels)
+                rows = []
+                labels = []
+
+        if len(rows) > 0:
+            self.batch.appendRows(rows, labels)
+
+    def calibrateBatch(self):
+        # subtracts the noise offset of the sensor from all parsed steps at once
+        if self.applyCalibration and self.calibration.isCalibrated():
+            values = self.batch.getInput()
+            self.calibration.apply(values, out=values)
+
+    # Parses any iterable of lines (file object, list, port reader) on the fly.
+    # If stepData is given, it is reused for every line instead of creating a
+    # new object per line. In lenient mode (strict = False) invalid lines are
+    # counted in self.errors and skipped.
+    def iterLines(self, lines, stepData=None):
+        # the counts are kept locally and passed to the metrics once at the end
+        parsedCtr = 0
+        noiseCtr = 0
+        skippedCtr = 0
+        failedCtr = 0
+        lineNumber = self.readLineCtr
+        try:
+            for (lineNumber, line) in enumerate(lines, self.readLineCtr + 1):
+                if isinstance(line, bytes):
+                    # raw data read from a serial port
+                    line = line.decode("utf-8", "replace")
+
+                # if line is empty: skip it
+                strippedLine = line.replace(" ", "").rstrip()
+                if len(strippedLine) == 0:
+                    continue
+
+                try:
+                    if strippedLine.find("noise") > -1:
+                        # for noise reduction purposes
+                        self.processNoiseDataLine(strippedLine)
+                        self.lineCtr += 1
+                        noiseCtr += 1
+                        continue
+                    elif len(line) < 230 or len(line) > 250:
+                        # line too short/long, skip it
+                        skippedCtr += 1
+                        self.errors.add("length", lineNumber)
+                        if self.strict:
+                            metrics.event("parser_line_skipped", "Couldn't parse line " + str(line)
+                                + " of the input file. It was skipped.", length=len(line))
+                        continue
+
+                    # normal data processing
+                    lineData = StepData() if stepData is None else stepData
+                    self.processLine(strippedLine, lineData)
+                except ParseError as error:
+                    failedCtr += 1
+                    if self.strict:
+                        raise
+                    self.errors.add(error.reason, lineNumber)
+                    continue
 
-                self.processLine(line.replace(" ", "").rstrip(), stepData)
-                self.data.append(stepData)
                 self.lineCtr += 1
+                parsedCtr += 1
+                yield lineData
+        finally:
+            self.readLineCtr = lineNumber
+            counts = {"parsed": parsedCtr, "noise": noiseCtr, "skipped": skippedCtr, "failed": failedCtr}
+            for (name, count) in counts.items():
+                self.lineCounts[name] += count
+            if self.recordMetrics:
+                recordLineCounts(counts)
 
     def processLine(self, line, stepData):
+        # single pass over the line: locate the json body, then read the label
+        # and all axis values with one compiled regex
         line = self.processRubbishAtStart(line)
         line = self.processRubbishAtEnd(line)
-        line = self.processPairOfLeadingAndTrailingBrackets(line)
+        line = line[2:-2]   # leading "[{" and trailing "}]"
+
         line = self.processLabel(line, stepData)
-        line = self.processAccelerationData(line, stepData)
+        self.processAccelerationData(line, stepData)
 
     def processNoiseDataLine(self, line):
         line = self.processRubbishAtStart(line)
@@ -111,38 +305,24 @@ class Parser(object):
         line = self.processNoiseData(line)
 
     def processRubbishAtStart(self, line):
-        # check for undefined start characters
-        if line.startswith("[{"):
-            # found valid beginning
-            return line
-        if len(line) < 2:
+        # search for the beginning of the json and cut off everything before it
+        start = line.find("[{")
+        if start < 0:
             # invalid line format/content
-            raise ValueError("Error processing line " + str(self.lineCtr)
+            raise ParseError("start", "Error processing line " + str(self.lineCtr)
                 + ": Start of line wasn't found and/or line is too short.")
-            return None
-        else:
-            # search for beginning of json
-            line = line[1:] # cut off first character and check again
-            line = self.processRubbishAtStart(line)
 
-        return line
+        return line[start:]
 
     def processRubbishAtEnd(self, line):
-        # check for undefined end characters
-        if line.endswith(",}}]"):
-            # found valid end
-            return line
-        if len(line) < 3:
+        # search for the ending of the json and cut off everything after it
+        end = line.rfind(",}}]")
+        if end < 0:
             # invalid line format/content
-            raise ValueError("Error processing line " + str(self.lineCtr)
+            raise ParseError("end", "Error processing line " + str(self.lineCtr)
                 + ": End of line wasn't found and/or line is too short.")
-            return None
-        else:
-            # search for ending of json
-            line = line[:-1] # cut off last character and check again
-            line = self.processRubbishAtEnd(line)
 
-        return line
+        return line[:end + 4]
 
     def processPairOfLeadingAndTrailingBrackets(self, line):
         # check for matching brackets
@@ -152,63 +332,55 @@ class Parser(object):
                 line = line.replace("[{", "", 1)
                 line = line[:-2]
             else:
-                raise ValueError("Error processing line " + str(self.lineCtr)
+                raise ParseError("brackets", "Error processing line " + str(self.lineCtr)
                     + ": No closing brackets (\"}]\") found at end of line.")
         else:
-            raise ValueError("Error processing line " + str(self.lineCtr)
-                    + ": No opening brackets (\"[{\") found at start of line.")
+            raise ParseError("brackets", "Error processing line " + str(self.lineCtr)
+                + ": No opening brackets (\"[{\") found at start of line.")
 
         return line
 
     def processLabel(self, line, stepData):
         # check for the "Label" keyword and delete it
-        if line.startswith("\"Label\""):
-            line = line.replace("\"Label\":", "")
-        else:
-            raise ValueError("Error processing line " + str(self.lineCtr)
-                    + ": The \"Label\" keyword was not found.")
+        if not line.startswith("\"Label\":"):
+            raise ParseError("label", "Error processing line " + str(self.lineCtr)
+                + ": The \"Label\" keyword was not found.")
 
         # process the actual label
-        if line.startswith("noMove"):
-            #found label
-            line = line.replace("noMove,", "")
-            stepData.setLabel(1)
-            return line
-        elif line.startswith("slowWalk"):
-            #found label
-            line = line.replace("slowWalk,", "")
-            stepData.setLabel(2)
-            return line
-        elif line.startswith("labelPlaceholder"):
-            #found label
-            line = line.replace("labelPlaceholder,", "")
-            stepData.setLabel(0)
-            return line
-        else:
-            raise ValueError("Error processing line " + str(self.lineCtr) + ": The label is not supported or missing.")
+        (label, separator, line) = line[8:].partition(",")
+        if separator == "" or label not in LABELS:
+            raise ParseError("label", "Error processing line " + str(self.lineCtr) + ": The label is not supported or missing.")
+
+        stepData.setLabel(LABELS[label])
+        return line
 
     def processAccelerationData(self, line, stepData):
-        if line.startswith("\"Acceleration\":"):
-            line = line.replace("\"Acceleration\":{", "", 3)
-            line = line.replace("}", "", 3)     # delete matching closing brackets
-
-            # replace keywords for axes
-            line = line.replace("\"x-Axes\":", "", 1)
-            line = line.replace(",\"x-Axes\":", ";", 2)
-            line = line.replace(",\"y-Axes\":", ";", 3)
-            line = line.replace(",\"z-Axes\":", ";", 3)
-            line = line.replace(",", "")        # delete trailing comma
-
-            splittedLine = line.split(";")
-            for i in range(len(splittedLine)):
-                splittedLine[i] = float(splittedLine[i])
-            stepData.setAccelerationData(splittedLine)
-        else:
-            raise ValueError("Error processing line " + str(self.lineCtr)
-                    + ": The \"Acceleration\" keyword was not found.")
+        if not line.startswith("\"Acceleration\":"):
+            raise ParseError("acceleration", "Error processing line " + str(self.lineCtr)
+                + ": The \"Acceleration\" keyword was not found.")
 
+        values = self.processAxesValues(line)
+        if len(values) != STEP_VALUES:
+            # e.g. a misspelled axis key: the row wouldn't fit into the batch
+            raise ParseError("values", "Error processing line " + str(self.lineCtr) + ": The step contains "
+                + str(len(values)) + " instead of " + str(STEP_VALUES) + " acceleration values.")
+
+        stepData.setAccelerationData(values)
         return line
 
+    def processAxesValues(self, line):
+        # read the values of all "x-Axes", "y-Axes" and "z-Axes" keys in order
+        try:
+            values = [float(value) for value in AXES_PATTERN.findall(line)]
+        except ValueError:
+            values = []
+
+        if len(values) == 0:
+            raise ParseError("values", "Error processing line " + str(self.lineCtr)
+                + ": The acceleration data is invalid or missing.")
+
+        return values
+
     def processNoiseData(self, line):
         # check for the "Label" keyword and delete it
         if line.startswith("\"Label\""):
@@ -216,24 +388,18 @@ class Parser(object):
 
         if line.find("noise") > -1:
             line = line.replace("noise,", "")
-            line = line.replace("\"Acceleration\":{", "", 3)
-            line = line.replace("}", "", 3)     # delete matching closing brackets
-
-            # replace keywords for axes
-            line = line.replace("\"x-Axes\":", "", 1)
-            line = line.replace(",\"x-Axes\":", ";", 2)
-            line = line.replace(",\"y-Axes\":", ";", 3)
-            line = line.replace(",\"z-Axes\":", ";", 3)
-            line = line.replace(",", "")        # delete trailing comma
+            values = self.processAxesValues(line)
+            if len(values) < STEP_VALUES:
+                raise ParseError("values", "Error processing line " + str(self.lineCtr)
+                    + ": The noise line contains less than 9 values.")
 
-            splittedLine = line.split(";")
-
-            self.average[0] += (float(splittedLine[0]) + float(splittedLine[3]) + float(splittedLine[6]))
-            self.average[1] += (float(splittedLine[1]) + float(splittedLine[4]) + float(splittedLine[7]))
-            self.average[2] += (float(splittedLine[2]) + float(splittedLine[5]) + float(splittedLine[8]))
+            self.average[0] += (values[0] + values[3] + values[6])
+            self.average[1] += (values[1] + values[4] + values[7])
+            self.average[2] += (values[2] + values[5] + values[8])
+            self.calibration.update(values[:9])
 
         else:
-            raise ValueError("Error processing line " + str(self.lineCtr) + ": The \"noise\" keyword was not found.")
+            raise ParseError("noise", "Error processing line " + str(self.lineCtr) + ": The \"noise\" keyword was not found.")
 
         return line
 
@@ -241,13 +407,31 @@ class Parser(object):
     def getDataArray(self):
         return self.data
 
+    def getDataBatch(self):
+        return self.batch
+
     def getAverage(self):
         return self.average
 
+    def getCalibration(self):
+        return self.calibration
+
+    def getLineCounts(self):
+        return self.lineCounts
+
+    def getErrors(self):
+        return self.errors
+
     # setter
     def setDestination(self, destinationPath):
         self.destination = destinationPath
 
+    def setCalibration(self, calibration, applyCalibration=True):
+        # e.g. the profile of the device the data comes from
+        self.calibration = calibration
+        self.applyCalibration = applyCalibration
+        self.keepCalibration = True
+
     # reverse replace (currently unused)
     def rreplace(self, string, old, new, occurrence):
         # replaces a char/string from the ending
@@ -0,0 +1,193 @@
+# Quantization.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides an inference-only export of trained networks for small
+# devices (gateways) and the matching predictor:
+#   - "float32": the weights are stored as float32
+#   - "int8":    the weights are stored as int8 with one scale per output unit
+#                (symmetric, scale = max. absolute weight / 127)
+# The predictor has no training state (no gradients, no cached activations)
+# and computes in float32; int8 weights are dequantized once when the model
+# is loaded. Optionally the sigmoid is looked up in a table, whose range is
+# calibrated per layer on representative data. The lookup (a gather) only
+# pays off on devices with a slow exp: with numpy's vectorized float32 exp
+# the exact sigmoid is faster, so it is the default.
+
+import numpy as np
+from src.Layers import activate, outputToLabels
+from src.ModelFile import writeModelFile, readModelFile
+from src.Scaler import FeatureScaler
+
+QUANTIZED_DTYPES = ("float32", "int8")
+
+# Writes the weights of a NeuralNetwork as inference-only model file.
+# calibrationData: scaled input data to calibrate the lookup table ranges
+def exportQuantized(neuralNetwork, path, dtype="int8", calibrationData=None, lutSize=4096, defaultRange=8.0):
+    if dtype not in QUANTIZED_DTYPES:
+        raise ValueError("The export type \"" + str(dtype) + "\" is not supported (float32 or int8).")
+
+    (modelHeader, modelArrays) = neuralNetwork.getModelData()
+    lutRanges = calibrateRanges(neuralNetwork, calibrationData, defaultRange)
+
+    header = {"quantized": dtype, "layerSizes": modelHeader["layerSizes"], "activations": modelHeader["activations"],
+        "output": modelHeader["output"], "useBias": modelHeader["useBias"], "scalerSamples": modelHeader["scalerSamples"],
+        "lutSize": lutSize, "lutRanges": lutRanges}
+    arrays = {"scalerMaxAbs": modelArrays["scalerMaxAbs"]}
+
+    for (i, layer) in enumerate(neuralNetwork.layers):
+        name = str(i + 1)
+        if dtype == "int8":
+            (arrays["W" + name], arrays["scale" + name]) = quantizeWeights(layer.weights)
+        else:
+            arrays["W" + name] = np.asarray(layer.weights, dtype=np.float32)
+        if layer.bias is not None:
+            arrays["b" + name] = np.asarray(layer.bias, dtype=np.float32)
+
+    writeModelFile(path, header, arrays)
+
+def quantizeWeights(weights):
+    # symmetric int8 quantization with one scale per column (output unit)
+    weights = np.asarray(weights, dtype=np.float64)
+    scale = np.max(np.abs(weights), axis=0) / 127
+    scale[scale == 0] = 1.0
+    quantizedWeights = np.clip(np.rint(weights / scale), -127, 127).astype(np.int8)
+
+    return (quantizedWeights, scale.astype(np.float32))
+
+def calibrateRanges(neuralNetwork, calibrationData=None, defaultRange=8.0, margin=1.1):
+    # Range of the sigmoid lookup table of every layer: the largest absolute
+    # weighted input seen on the calibration data (plus a margin), at least 1
+    # and at most 16 (the sigmoid is saturated there). Without data defaultRange.
+    if calibrationData is None:
+        return [defaultRange] * len(neuralNetwork.layers)
+
+    ranges = []
+    activations = np.asarray(calibrationData, dtype=np.float64)
+    for layer in neuralNetwork.layers:
+        weightedInput = np.dot(activations, layer.weights)
+        if layer.bias is not None:
+            weightedInput += layer.bias
+        ranges.append(float(np.clip(np.max(np.abs(weightedInput), initial=0.0) * margin, 1.0, 16.0)))
+        activations = activate(layer.activation, weightedInput)
+
+    return ranges
+
+class QuantizedPredictor(object):
+    def __init__(self, useLookupTable=False):
+        # parameters
+        self.useLookupTable = useLookupTable
+        self.dtype = None
+        self.output = "sigmoid"
+        self.outputSize = 1
+        self.weights = []       # float32 (int8 weights are dequantized on load)
+        self.biases = []
+        self.activations = []
+        self.lookupTables = []  # per layer: sigmoid table or None
+        self.scaler = FeatureScaler()
+
+    def load(self, path, mmap=True):
+        (header, arrays) = readModelFile(path, mmap)
+        if "quantized" not in header:
+            raise ValueError("The model file \"" + str(path) + "\" is no quantized model (see exportQuantized).")
+
+        self.dtype = header["quantized"]
+        self.output = header["output"]
+        self.outputSize = header["layerSizes"][-1]
+        self.activations = header["activations"]
+        self.weights = []
+        self.biases = []
+        self.lookupTables = []
+
+        for i in range(len(self.activations)):
+            name = str(i + 1)
+            if self.dtype == "int8":
+                weights = arrays["W" + name].astype(np.float32) * arrays["scale" + name]
+            else:
+                weights = arrays["W" + name]    # float32, used directly from the file
+            self.weights.append(weights)
+            self.biases.append(arrays["b" + name] if header["useBias"] else None)
+
+            if self.useLookupTable and self.activations[i] == "sigmoid":
+                # the mapping of the weighted input to the table index is folded
+                # into the weights and the bias: index = x * W' + b'
+                (table, lowerBound, entriesPerUnit) = createSigmoidTable(header["lutSize"], header["lutRanges"][i])
+                bias = np.zeros(weights.shape[1], dtype=np.float32) if self.biases[i] is None else self.biases[i]
+                self.weights[i] = weights * entriesPerUnit
+                self.biases[i] = (bias - lowerBound) * entriesPerUnit
+                self.lookupTables.append(table)
+            else:
+                self.lookupTables.append(None)
+
+        self.scaler = FeatureScaler(header["layerSizes"][0])
+        self.scaler.setMaxAbs(arrays["scalerMaxAbs"], header["scalerSamples"])
+
+        return self
+
+    # Forward pass in float32 with buffers, which are allocated once per call
+    # (like NeuralNetwork.predictBatch)
+    def predictBatch(self, X, out=None, chunkSize=16384):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)    # single step
+
+        if out is None:
+            out = np.empty((len(X), self.outputSize), dtype=np.float32)
+
+        bufferSize = max(min(chunkSize, len(X)), 1)
+        buffers = [np.empty((bufferSize, W.shape[1]), dtype=np.float32) for W in self.weights]
+        indices = np.empty((bufferSize, max(W.shape[1] for W in self.weights)), dtype=np.intp)
+
+        for start in range(0, len(X), chunkSize):
+            activations = np.asarray(X[start:start + chunkSize], dtype=np.float32)
+            rows = len(activations)
+
+            for (W, b, activation, lookupTable, buffer) in zip(self.weights, self.biases, self.activations,
+                    self.lookupTables, buffers):
+                np.dot(activations, W, out=buffer[:rows])
+                if b is not None:
+                    buffer[:rows] += b
+                if lookupTable is None:
+                    activations = activate(activation, buffer[:rows])
+                else:
+                    activations = lookupSigmoid(buffer[:rows], lookupTable, indices[:rows, :W.shape[1]])
+            out[start:start + rows] = activations
+
+        return out
+
+    # same mapping as NeuralNetwork.outputToLabels
+    def outputToLabels(self, outputs):
+        return outputToLabels(self.output, outputs)
+
+# Sigmoid values at the centers of lutSize intervals of [-lutRange, lutRange]
+def createSigmoidTable(lutSize, lutRange):
+    step = 2 * lutRange / lutSize
+    centers = -lutRange + step * (np.arange(lutSize) + 0.5)
+    return ((1 / (1 + np.exp(-centers))).astype(np.float32), np.float32(-lutRange), np.float32(1 / step))
+
+# Replaces the table positions t by the sigmoid values of the table (in place)
+def lookupSigmoid(t, table, indices):
+    np.clip(t, 0, len(table) - 1, out=t)
+    indices[...] = t        # truncation = index of the interval
+    np.take(table, indices, out=t)
+
+    return t
+
+# Compares the outputs and labels of an exported model with the float64 model
+# on (scaled) data X; with the labels y also the accuracy of both models
+def accuracyReport(neuralNetwork, predictor, X, y=None):
+    referenceOutputs = neuralNetwork.predictBatch(X)
+    outputs = predictor.predictBatch(X).astype(np.float64)
+    referenceLabels = neuralNetwork.outputToLabels(referenceOutputs)
+    labels = predictor.outputToLabels(outputs)
+
+    report = {"samples": len(X), "maxAbsError": float(np.max(np.abs(outputs - referenceOutputs), initial=0.0)),
+        "meanAbsError": float(np.mean(np.abs(outputs - referenceOutputs))) if len(X) > 0 else 0.0,
+        "labelAgreement": float(np.mean(labels == referenceLabels)) if len(X) > 0 else 1.0}
+    if y is not None:
+        y = np.asarray(y).ravel()
+        report["referenceAccuracy"] = float(np.mean(referenceLabels == y))
+        report["accuracy"] = float(np.mean(labels == y))
+
+    return report
@@ -0,0 +1,148 @@
+# ResultWriter.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides a writer for classification results. The file stays
+# open with a large buffer, the label names are built for whole arrays at
+# once and the file is rotated daily. Optionally the formatting and writing
+# is done by a background thread.
+#
+# formats: "text"   label names separated by commas (like saveResults)
+#          "csv"    one line per step: label number, outputs of the NN
+#          "binary" one int8 label number per step
+
+import os
+import queue
+import threading
+import time
+import numpy as np
+from src.Parser import LABELS
+
+# label number --> label name
+LABEL_NAMES = np.array([name for (name, number) in sorted(LABELS.items(), key=lambda item: item[1])])
+
+class ResultWriter(object):
+    def __init__(self, path="classificationResults.txt", format="text", bufferSize=1024 * 1024, asyncFlush=False):
+        if format not in ("text", "csv", "binary"):
+            raise ValueError("The result format \"" + str(format) + "\" is not supported.")
+
+        # parameters
+        self.path = path            # may contain strftime patterns, e.g. "results_%Y%m%d.txt"
+        self.format = format
+        self.bufferSize = bufferSize
+        self.file = None
+        self.currentPath = None
+        self.currentDate = None
+        self.hasContent = False
+        self.resultQueue = None
+        self.writerThread = None
+        self.writerError = None     # exception of the background thread, raised by the next call
+
+        if asyncFlush:
+            self.resultQueue = queue.Queue(maxsize=64)
+            self.writerThread = threading.Thread(target=self.runWriter, daemon=True)
+            self.writerThread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.close()
+
+    def write(self, labels, outputs=None):
+        # labels: label numbers as returned by NeuralNetwork.outputToLabels
+        if self.resultQueue is None:
+            self.writeResults(labels, outputs)
+        else:
+            self.raiseWriterError()
+            self.resultQueue.put((np.array(labels), None if outputs is None else np.array(outputs)))
+
+    def writeResults(self, labels, outputs):
+        labels = np.asarray(labels, dtype=np.int8).ravel()
+        if len(labels) == 0:
+            return None
+        self.rotate()
+
+        if self.format == "text":
+            text = ",".join(LABEL_NAMES[labels])
+            self.file.write(("," + text) if self.hasContent else text)
+        elif self.format == "csv":
+            if outputs is None:
+                columns = labels.reshape(-1, 1)
+            else:
+                columns = np.column_stack([labels, np.asarray(outputs).reshape(len(labels), -1)])
+            np.savetxt(self.file, columns, fmt=["%d"] + ["%.6f"] * (columns.shape[1] - 1), delimiter=",")
+        else:
+            self.file.write(labels.tobytes())
+
+        self.hasContent = True
+        return None
+
+    def rotate(self):
+        # a new day starts a new file: either a new dated file or the old file
+        # is overwritten (as saveResults did)
+        date = time.strftime("%Y%m%d")
+        if date == self.currentDate:
+            return None
+
+        if self.file is not None:
+            self.file.close()
+
+        self.currentDate = date
+        self.currentPath = time.strftime(self.path)
+        wasWrittenToday = (os.path.exists(self.currentPath)
+            and time.strftime("%Y%m%d", time.localtime(os.path.getmtime(self.currentPath))) == date)
+
+        mode = ("a" if wasWrittenToday else "w") + ("b" if self.format == "binary" else "")
+        self.file = open(self.currentPath, mode, buffering=self.bufferSize)
+        self.hasContent = wasWrittenToday and os.path.getsize(self.currentPath) > 0
+
+        return None
+
+    def runWriter(self):
+        while True:
+            item = self.resultQueue.get()
+            try:
+                if item is None:
+                    break
+                if isinstance(item, str):     # flush request
+                    if self.file is not None:
+                        self.file.flush()
+                else:
+                    self.writeResults(*item)
+            except Exception as error:
+                # e.g. a full disk: keep the first error for the caller, the
+                # thread keeps running, so flush() and close() can't block
+                if self.writerError is None:
+                    self.writerError = error
+            finally:
+                self.resultQueue.task_done()
+
+    def raiseWriterError(self):
+        if self.writerError is not None:
+            (error, self.writerError) = (self.writerError, None)
+            raise error
+
+    def flush(self):
+        if self.resultQueue is not None:
+            self.resultQueue.put("flush")
+            self.resultQueue.join()
+            self.raiseWriterError()
+        elif self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        try:
+            if self.writerThread is not None:
+                self.resultQueue.put(None)
+                self.writerThread.join()
+                self.writerThread = None
+                self.resultQueue = None
+        finally:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                self.currentDate = None
+
+        self.raiseWriterError()
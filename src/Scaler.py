@@ -0,0 +1,56 @@
+# Scaler.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides the feature scaling of the NN input. The statistics (the
+# maximum absolute value per feature) are computed once on the training data,
+# can be updated incrementally and are stored together with the model, so
+# every prediction (batch or single step) is scaled the same way
+
+import numpy as np
+
+class FeatureScaler(object):
+    def __init__(self, featureSize=9):
+        # parameters
+        self.maxAbs = np.zeros(featureSize)
+        self.factors = np.ones(featureSize)     # 1 / maxAbs, what the input is multiplied with
+        self.sampleCtr = 0
+
+    def fit(self, X):
+        self.maxAbs[...] = 0.0
+        self.sampleCtr = 0
+        return self.partialFit(X)
+
+    def partialFit(self, X):
+        # updates the statistics with further (streamed) data
+        X = np.asarray(X).reshape(-1, len(self.maxAbs))
+        if len(X) > 0:
+            np.maximum(self.maxAbs, np.amax(np.abs(X), axis=0), out=self.maxAbs)
+            self.sampleCtr += len(X)
+            self.updateFactors()
+
+        return self
+
+    def transform(self, X, out=None):
+        # out=X scales in place (X must be a float array then)
+        X = np.asarray(X)
+        dtype = X.dtype if X.dtype.kind == "f" else np.float64
+        return np.multiply(X, self.factors.astype(dtype, copy=False), out=out)
+
+    def updateFactors(self):
+        # features which were always 0 are left unscaled
+        self.factors = np.divide(1.0, self.maxAbs, out=np.ones_like(self.maxAbs), where=self.maxAbs > 0)
+
+    def isFitted(self):
+        return self.sampleCtr > 0
+
+    # getter
+    def getMaxAbs(self):
+        return self.maxAbs
+
+    # setter
+    def setMaxAbs(self, maxAbs, sampleCtr=1):
+        self.maxAbs = np.array(maxAbs, dtype=float)
+        self.sampleCtr = sampleCtr
+        self.updateFactors()
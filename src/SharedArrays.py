@@ -0,0 +1,39 @@
+# SharedArrays.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides numpy arrays in shared memory, so worker processes can
+# read the dataset and read/write the weights without copying them. The
+# process which creates an array owns it and has to call releaseSharedArray
+
+from multiprocessing import shared_memory
+import numpy as np
+
+def createSharedArray(shape, dtype=np.float64):
+    # returns (shared memory block, array, descriptor for attachSharedArray)
+    shape = (shape,) if isinstance(shape, int) else tuple(shape)
+    dtype = np.dtype(dtype)
+    size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    return (block, array, (block.name, shape, dtype.str))
+
+def shareArray(array):
+    # copies an existing array into shared memory
+    (block, sharedArray, descriptor) = createSharedArray(np.shape(array), np.asarray(array).dtype)
+    sharedArray[...] = array
+
+    return (block, sharedArray, descriptor)
+
+def attachSharedArray(descriptor):
+    # used by the worker processes; returns (shared memory block, array)
+    (name, shape, dtype) = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    return (block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+
+def releaseSharedArray(block, unlink=True):
+    block.close()
+    if unlink:
+        block.unlink()
@@ -0,0 +1,103 @@
+# StepBatch.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides a columnar container to store many steps at once. The
+# acceleration data lives in one float32 (N x 9) array and the labels in one
+# int8 vector, so the parsed data can be handed to the NN without conversion
+
+import numpy as np
+from src.StepData import StepData
+
+class StepBatch(object):
+    def __init__(self, capacity=1024, featureSize=9):
+        # parameters
+        self.size = 0
+        self.values = np.empty((max(capacity, 1), featureSize), dtype=np.float32)
+        self.labels = np.empty(max(capacity, 1), dtype=np.int8)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        # lightweight view for callers which still expect StepData objects
+        if index < 0:
+            index += self.size
+        if index < 0 or index >= self.size:
+            raise IndexError("StepBatch index " + str(index) + " is out of range.")
+
+        return StepData(int(self.labels[index]), self.values[index])
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield StepData(int(self.labels[i]), self.values[i])
+
+    def append(self, label, accelerationData):
+        if self.size == len(self.labels):
+            self.reserve(max(2 * self.size, 1024))
+
+        self.values[self.size] = accelerationData
+        self.labels[self.size] = label
+        self.size += 1
+
+    def appendRows(self, accelerationData, labels):
+        # appends many rows at once (e.g. lists of rows collected by the parser)
+        count = len(labels)
+        if self.size + count > len(self.labels):
+            self.reserve(max(self.size + count, 2 * self.size))     # only grow if the rows don't fit
+        self.values[self.size:self.size + count] = accelerationData
+        self.labels[self.size:self.size + count] = labels
+        self.size += count
+
+    def extend(self, other):
+        self.reserve(self.size + len(other))
+        self.values[self.size:self.size + len(other)] = other.getInput()
+        self.labels[self.size:self.size + len(other)] = other.getLabels()
+        self.size += len(other)
+
+    def reserve(self, capacity):
+        # grow the preallocated arrays, keeps the already stored rows
+        if capacity <= len(self.labels):
+            return None
+
+        values = np.empty((capacity, self.values.shape[1]), dtype=self.values.dtype)
+        labels = np.empty(capacity, dtype=self.labels.dtype)
+        values[:self.size] = self.values[:self.size]
+        labels[:self.size] = self.labels[:self.size]
+        self.values = values
+        self.labels = labels
+
+        return None
+
+    def trim(self):
+        # release the unused capacity
+        self.values = self.values[:self.size].copy()
+        self.labels = self.labels[:self.size].copy()
+
+    def clear(self):
+        self.size = 0
+
+    # getter (views, no copies)
+    def getInput(self):
+        return self.values[:self.size]
+
+    def getLabels(self):
+        return self.labels[:self.size]
+
+    def getLabelColumn(self):
+        # labels as (N x 1) column, the shape used for y in train()
+        return self.labels[:self.size].reshape(-1, 1)
+
+    def getDataArray(self):
+        return list(self)
+
+    # create a batch around already existing arrays, e.g. loaded from disk
+    def setArrays(self, values, labels):
+        if len(values) != len(labels):
+            raise ValueError("The amount of acceleration data rows (" + str(len(values))
+                + ") doesn't match the amount of labels (" + str(len(labels)) + ").")
+
+        self.values = values
+        self.labels = labels
+        self.size = len(labels)
@@ -1,15 +1,17 @@
 # StepData.py
 # Author: Armin Müller
 # Created on 01.11.2018
-# Last Modified on: 19.11.2018
+# Last Modified on: 18.10.2026
 #
 # This file provides a data object to store step data in it
 
 class StepData(object):
-    def __init__(self):
+    __slots__ = ("label", "accelerationData")
+
+    def __init__(self, label=0, accelerationData=None):
         # parameters
-        self.label = 0
-        self.accelerationData = []
+        self.label = label
+        self.accelerationData = [] if accelerationData is None else accelerationData
     
     #getter
     def getLabel(self):
@@ -23,4 +25,4 @@ class StepData(object):
         self.label = newLabel
     
     def setAccelerationData(self, newAccelerationData):
-        self.accelerationData = newAccelerationData
\ No newline at end of file
+        self.accelerationData = newAccelerationData
@@ -0,0 +1,128 @@
+# StreamClassifier.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides a real-time classifier for data streams (serial port,
+# pty or any other object with a readline() method). A reader thread parses
+# the incoming lines into a bounded queue and a classifier thread predicts
+# them in micro-batches, so the labels are available while the stream runs
+
+import queue
+import threading
+import time
+import numpy as np
+from src.Metrics import metrics
+from src.Parser import Parser
+from src.StepData import StepData
+
+class StreamClassifier(object):
+    def __init__(self, neuralNetwork, source, callback=None, batchSize=64, maxLatency=0.05,
+            queueSize=4096):
+        # parameters
+        self.neuralNetwork = neuralNetwork
+        self.source = source                # object with a readline() method
+        self.callback = callback            # called with (labels, outputs) of every micro-batch
+        self.batchSize = batchSize          # max. amount of steps per prediction
+        self.maxLatency = maxLatency        # max. time (in s) a step waits for its micro-batch
+        self.parser = Parser()
+        self.stepQueue = queue.Queue(maxsize=queueSize)
+        self.resultQueue = queue.Queue()
+        self.listen = False
+        self.readerThread = None
+        self.classifierThread = None
+
+    def start(self):
+        self.listen = True
+        self.readerThread = threading.Thread(target=self.readSource, daemon=True)
+        self.classifierThread = threading.Thread(target=self.classify, daemon=True)
+        self.readerThread.start()
+        self.classifierThread.start()
+
+    def stop(self):
+        # the reader stops after the current line, the classifier after the
+        # already queued steps
+        self.listen = False
+
+    def join(self, timeout=None):
+        self.classifierThread.join(timeout)
+
+    def readSource(self):
+        stepData = StepData()
+        try:
+            while self.listen:
+                line = self.source.readline()
+                if len(line) == 0:
+                    break   # end of stream
+
+                try:
+                    for stepData in self.parser.iterLines([line], stepData):
+                        # blocks if the classifier can't keep up (backpressure)
+                        self.stepQueue.put(np.array(stepData.getAccelerationData(), dtype=np.float32))
+                except ValueError as error:
+                    metrics.event("stream_line_failed", str(error) + " The line was skipped.")
+        finally:
+            self.stepQueue.put(None)    # tell the classifier that the stream ended
+
+    def classify(self):
+        endOfStream = False
+        try:
+            while not endOfStream:
+                step = self.stepQueue.get()
+                if step is None:
+                    break
+
+                # collect further steps until the batch is full or the latency
+                # budget of the first step is used up
+                steps = [step]
+                deadline = time.monotonic() + self.maxLatency
+                while len(steps) < self.batchSize:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        step = self.stepQueue.get(timeout=max(remaining, 0))
+                    except queue.Empty:
+                        break
+                    if step is None:
+                        endOfStream = True
+                        break
+                    steps.append(step)
+
+                # a failing batch (or callback) must not end the classification
+                try:
+                    self.emit(np.stack(steps))
+                except Exception as error:
+                    metrics.increment("stream_batches_failed_total")
+                    metrics.event("stream_batch_failed", "Classifying a batch of " + str(len(steps))
+                        + " steps failed: " + str(error) + " The batch was skipped.", steps=len(steps))
+        finally:
+            self.resultQueue.put(None)  # iterResults() ends even if the thread fails
+
+    def emit(self, steps):
+        self.neuralNetwork.scaler.transform(steps, out=steps)
+        outputs = self.neuralNetwork.predictBatch(steps)
+        labels = self.neuralNetwork.outputToLabels(outputs)
+
+        if self.callback is None:
+            self.resultQueue.put((labels, outputs))
+        else:
+            self.callback(labels, outputs)
+
+    # Yields (labels, outputs) of every micro-batch until the stream ends
+    # (only if no callback is used)
+    def iterResults(self):
+        while True:
+            result = self.resultQueue.get()
+            if result is None:
+                return
+            yield result
+
+# Opens the serial port the sensor is connected to
+def openPort(port="COM9", baudrate=115200):
+    import serial   # only needed for real hardware
+
+    ser = serial.Serial(port, baudrate, timeout=None)
+    if not ser.isOpen():
+        raise ValueError("Opening the serial port connection on port \"" + port + "\" failed")
+    print(ser.name + " was successfully opened.")
+
+    return ser
@@ -0,0 +1,89 @@
+# Windowing.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides the segmentation of continuous accelerometer streams into
+# overlapping windows and the extraction of features per window (mean,
+# variance, energy and FFT band power of every axis). The windows are strided
+# views of the stream, so no sample is copied. The resulting StepBatch can be
+# used like parsed step data to train the NN.
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.StepBatch import StepBatch
+
+class SlidingWindow(object):
+    def __init__(self, size=64, stride=32, bands=4):
+        if size < 2 or stride < 1 or bands < 1 or bands > size // 2:
+            raise ValueError("Invalid window configuration: size = " + str(size) + ", stride = "
+                + str(stride) + ", bands = " + str(bands) + ".")
+
+        # parameters
+        self.size = size        # samples per window
+        self.stride = stride    # samples between the starts of two windows
+        self.bands = bands      # amount of FFT bands per axis
+
+    def windows(self, stream):
+        # stream: (samples x axes) --> view of shape (windows x axes x size)
+        stream = np.asarray(stream)
+        if len(stream) < self.size:
+            return np.empty((0, stream.shape[1], self.size), dtype=stream.dtype)
+
+        return sliding_window_view(stream, self.size, axis=0)[::self.stride]
+
+    def extractFeatures(self, stream):
+        # returns (windows x featureSize): per axis mean, variance, energy and
+        # the mean power of every FFT band (DC excluded)
+        windows = self.windows(stream)
+        mean = np.mean(windows, axis=2)
+        variance = np.var(windows, axis=2)
+        energy = np.mean(np.square(windows), axis=2)
+
+        power = np.square(np.abs(np.fft.rfft(windows, axis=2)[:, :, 1:]))
+        edges = np.linspace(0, power.shape[2], self.bands + 1).astype(int)
+        bandPower = np.add.reduceat(power, edges[:-1], axis=2) / np.diff(edges)
+
+        # explicit width: a stream shorter than one window has no windows
+        bandPower = bandPower.reshape(windows.shape[0], windows.shape[1] * self.bands)
+
+        return np.concatenate([mean, variance, energy, bandPower], axis=1).astype(np.float32)
+
+    def windowLabels(self, labels, labelCount=3):
+        # most frequent label of every window, counted with cumulative sums
+        labels = np.asarray(labels)
+        starts = np.arange(0, len(labels) - self.size + 1, self.stride)
+        counts = np.zeros((labelCount, len(labels) + 1), dtype=np.int64)
+        np.cumsum(labels[np.newaxis, :] == np.arange(labelCount)[:, np.newaxis], axis=1, out=counts[:, 1:])
+
+        return np.argmax(counts[:, starts + self.size] - counts[:, starts], axis=0).astype(np.int8)
+
+    def toBatch(self, stream, labels=None):
+        # features (and labels) of all windows as StepBatch
+        features = self.extractFeatures(stream)
+        if labels is None:
+            labels = np.zeros(len(features), dtype=np.int8)
+        else:
+            labels = self.windowLabels(labels)
+
+        batch = StepBatch(0, features.shape[1])
+        batch.setArrays(features, labels)
+
+        return batch
+
+    def getFeatureSize(self, axes=3):
+        return axes * (3 + self.bands)
+
+# Turns parsed steps (3 samples with x, y and z each) into a continuous stream
+# (samples x 3) and the labels of every sample
+def batchToStream(batch):
+    return (batch.getInput().reshape(-1, 3), np.repeat(batch.getLabels(), 3))
+
+# Reads a raw sensor log with one sample per line ("x,y,z" or "x y z")
+def readStream(path, delimiter=None):
+    with open(path, "r") as file:
+        firstLine = file.readline()
+    if delimiter is None and "," in firstLine:
+        delimiter = ","
+
+    return np.loadtxt(path, delimiter=delimiter, ndmin=2, dtype=np.float32)
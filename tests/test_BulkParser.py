@@ -0,0 +1,34 @@
+# test_BulkParser.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides regression tests of the BulkParser
+#
+# Usage: python -m unittest discover tests   (from the root of the project)
+
+import os
+import tempfile
+import unittest
+from src.BulkParser import BulkParser
+from src.Parser import ParseError
+from test_Parser import createLine
+
+class BulkParserTest(unittest.TestCase):
+    def testStrictErrorOfLaterChunk(self):
+        # the error of a chunk names the file and the byte the chunk starts at
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "steps.txt")
+            with open(path, "w") as file:
+                file.write("\n".join([createLine()] * 10 + [createLine("unknown")]) + "\n")
+
+            bulkParser = BulkParser(maxWorkers=1, chunkSize=1024)
+            bulkParser.setSources([path])
+            with self.assertRaises(ParseError) as context:
+                bulkParser.processData()
+
+        self.assertEqual(context.exception.reason, "label")
+        self.assertTrue(str(context.exception).startswith(path + " (chunk starting at byte 2048"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# test_Checkpointer.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides regression tests of the Checkpointer
+#
+# Usage: python -m unittest discover tests   (from the root of the project)
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.MachineLearning import NeuralNetwork
+from src.Optimizer import Adam
+from src.Checkpointer import Checkpointer, CheckpointMismatchError
+
+def createNetwork(X):
+    neuralNetwork = NeuralNetwork()
+    neuralNetwork.scaler.fit(X)
+    return neuralNetwork
+
+class CheckpointerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpointer = Checkpointer(os.path.join(self.directory.name, "checkpoint.nn"))
+        rng = np.random.default_rng(0)
+        self.X = rng.uniform(-1, 1, (40, 9))
+        self.y = rng.integers(3, size=(40, 1)) / 3
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def fit(self, X, maxEpochs, maxLossValue=None):
+        return createNetwork(X).fit(X, self.y, Adam(), maxEpochs=maxEpochs, patience=100, maxLossValue=maxLossValue,
+            checkpointer=self.checkpointer)
+
+    def testResumeWithMoreEpochs(self):
+        # a training stopped by maxEpochs continues after its last epoch
+        history = self.fit(self.X, maxEpochs=3)
+        resumedHistory = self.fit(self.X, maxEpochs=5)
+
+        self.assertEqual(len(history), 3)
+        self.assertEqual(len(resumedHistory), 5)
+        self.assertEqual(resumedHistory[:3], history)
+
+    def testResumeFinishedTraining(self):
+        # a training stopped by maxLossValue isn't continued
+        history = self.fit(self.X, maxEpochs=3, maxLossValue=np.inf)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(self.fit(self.X, maxEpochs=10, maxLossValue=np.inf), history)
+
+    def testOtherData(self):
+        self.fit(self.X, maxEpochs=2)
+        with self.assertRaises(CheckpointMismatchError):
+            self.fit(2 * self.X, maxEpochs=4)
+
+if __name__ == "__main__":
+    unittest.main()
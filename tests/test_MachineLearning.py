@@ -0,0 +1,43 @@
+# test_MachineLearning.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides regression tests of the NeuralNetwork
+#
+# Usage: python -m unittest discover tests   (from the root of the project)
+
+import unittest
+import numpy as np
+from src.MachineLearning import NeuralNetwork
+from src.Optimizer import Adam
+from src.StepBatch import StepBatch
+
+# 100 steps of every label, whose values are close to the label number
+def createSeparableBatch():
+    rng = np.random.default_rng(0)
+    labels = np.repeat(np.arange(3, dtype=np.int8), 100)
+    batch = StepBatch(0)
+    batch.setArrays((labels[:, None] + rng.normal(scale=0.1, size=(300, 9))).astype(np.float32), labels)
+    return batch
+
+class NeuralNetworkTest(unittest.TestCase):
+    def testDecodeTrainingLabels(self):
+        # the sigmoid output is trained on label / 3 and has to be decoded to all three labels
+        np.random.seed(0)
+        batch = createSeparableBatch()
+        neuralNetwork = NeuralNetwork(hiddenSizes=(6,))
+        (X, y) = neuralNetwork.setInputForClassificationScaled(batch)
+        neuralNetwork.fit(X, y, Adam(learningRate=0.03), batchSize=32, maxEpochs=500, patience=20)
+
+        labels = neuralNetwork.outputToLabels(neuralNetwork.predictBatch(X))
+        self.assertEqual(labels.tolist(), batch.getLabels().tolist())
+
+    def testDecodeEncodedLabels(self):
+        labels = np.array([0, 1, 2, 1, 0], dtype=np.int8)
+        for output in ("sigmoid", "softmax"):
+            neuralNetwork = NeuralNetwork(output=output)
+            self.assertEqual(neuralNetwork.outputToLabels(neuralNetwork.encodeLabels(labels)).tolist(), labels.tolist())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# test_Parser.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides regression tests of the Parser
+#
+# Usage: python -m unittest discover tests   (from the root of the project)
+
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+from src.Parser import Parser, ParseError
+from src.Calibration import NoiseCalibration
+
+VALUES = [0.491607, 1.18077, 1.36139, 0.5959, -1.547176, 1.473782, 0.17504, -1.94754, -0.3674]
+
+# A step line like the ones of the sensor, padded to a valid length
+def createLine(label="noMove", values=VALUES):
+    blocks = []
+    for i in range(3):
+        blocks.append("\"Acceleration\":{" + ",".join("\"" + axis + "-Axes\":" + str(value)
+            for (axis, value) in zip("xyz", values[3 * i:3 * i + 3])))
+    line = "[{\"Label\":" + label + "," + "},".join(blocks) + ",}}]"
+    return line + " " * (235 - len(line))
+
+class ParserTest(unittest.TestCase):
+    def testValidLine(self):
+        parser = Parser()
+        parser.processDataArrayBatch([createLine()])
+
+        self.assertEqual(len(parser.getDataBatch()), 1)
+        self.assertEqual(parser.getDataBatch().getLabels().tolist(), [1])
+        self.assertTrue(np.allclose(parser.getDataBatch().getInput()[0], VALUES))
+
+    def testMisspelledAxisKeyStrict(self):
+        # one renamed "z-Axes" key: 8 instead of 9 values
+        line = createLine().replace("\"z-Axes\"", "\"w-Axes\"", 1)
+        self.assertEqual(len(line), 235)
+
+        with self.assertRaises(ParseError) as context:
+            Parser().processDataArrayBatch([createLine(), line])
+        self.assertEqual(context.exception.reason, "values")
+
+    def testMisspelledAxisKeyLenient(self):
+        parser = Parser(strict=False)
+        invalidLine = createLine().replace("\"z-Axes\"", "\"w-Axes\"", 1)
+        parser.processDataArrayBatch([createLine(), invalidLine, createLine("slowWalk")])
+
+        self.assertEqual(parser.getDataBatch().getLabels().tolist(), [1, 2])
+        self.assertEqual(parser.getErrors().getCounts(), {"values": 1})
+        self.assertEqual(parser.getErrors().getSamples(), {"values": [2]})
+
+    def testParseTwice(self):
+        # the noise of the file is counted once, a profile keeps the noise of every parse
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "steps.txt")
+            with open(path, "w") as file:
+                file.write(createLine("noise") + "\n" + createLine() + "\n")
+
+            parser = Parser()
+            parser.setDestination(path)
+            parser.processDataBatch()
+            parser.processDataBatch()
+            self.assertEqual(parser.getCalibration().count, 3)
+            self.assertTrue(np.allclose(parser.getAverage(), np.sum(np.reshape(VALUES, (3, 3)), axis=0)))
+
+            profile = NoiseCalibration()
+            parser.setCalibration(profile, applyCalibration=False)
+            parser.processData()
+            parser.processData()
+            self.assertEqual(profile.count, 6)
+
+    def testParseErrorPickle(self):
+        # needed to pass the error out of the BulkParser worker processes
+        error = pickle.loads(pickle.dumps(ParseError("label", "Error processing line 3: The label is not supported.")))
+
+        self.assertIsInstance(error, ParseError)
+        self.assertEqual(error.reason, "label")
+        self.assertEqual(str(error), "Error processing line 3: The label is not supported.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# test_ResultWriter.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides regression tests of the ResultWriter
+#
+# Usage: python -m unittest discover tests   (from the root of the project)
+
+import os
+import tempfile
+import threading
+import unittest
+from src.ResultWriter import ResultWriter
+
+class ResultWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.txt")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testAsyncWrite(self):
+        with ResultWriter(self.path, asyncFlush=True) as resultWriter:
+            resultWriter.write([1, 2])
+            resultWriter.write([0])
+
+        with open(self.path, "r") as file:
+            self.assertEqual(file.read(), "noMove,slowWalk,labelPlaceholder")
+
+    def testFlushRaisesWriterError(self):
+        # label 7 doesn't exist: the background thread fails, flush() must
+        # raise its error instead of blocking
+        resultWriter = ResultWriter(self.path, asyncFlush=True)
+        resultWriter.write([7])
+
+        errors = []
+
+        def flush():
+            try:
+                resultWriter.flush()
+            except IndexError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=flush, daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+
+        # the writer keeps working after the error
+        resultWriter.write([1])
+        resultWriter.close()
+        with open(self.path, "r") as file:
+            self.assertEqual(file.read(), "noMove")
+
+if __name__ == "__main__":
+    unittest.main()
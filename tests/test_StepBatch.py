@@ -0,0 +1,40 @@
+# test_StepBatch.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides regression tests of the StepBatch
+#
+# Usage: python -m unittest discover tests   (from the root of the project)
+
+import unittest
+import numpy as np
+from src.StepBatch import StepBatch
+
+class StepBatchTest(unittest.TestCase):
+    def testAppendRowsIntoPreallocatedBatch(self):
+        # the rows fit into the preallocated arrays: no reallocation
+        batch = StepBatch(10000)
+        values = batch.values
+        rows = np.ones((4096, 9), dtype=np.float32)
+        labels = np.ones(4096, dtype=np.int8)
+
+        batch.appendRows(rows, labels)
+        batch.appendRows(rows, labels)
+        batch.appendRows(rows[:1808], labels[:1808])
+
+        self.assertIs(batch.values, values)
+        self.assertEqual(len(batch), 10000)
+        self.assertEqual(len(batch.labels), 10000)
+
+    def testAppendRowsGrows(self):
+        batch = StepBatch(10)
+        batch.appendRows(np.arange(45, dtype=np.float32).reshape(5, 9), [0, 1, 2, 1, 0])
+        batch.appendRows(np.ones((20, 9), dtype=np.float32), np.ones(20, dtype=np.int8))
+
+        self.assertEqual(len(batch), 25)
+        self.assertEqual(batch.getLabels()[:5].tolist(), [0, 1, 2, 1, 0])
+        self.assertEqual(batch.getInput()[4].tolist(), list(range(36, 45)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# test_StreamClassifier.py
+# Author: Armin Müller
+# Created on 18.10.2026
+# Last Modified on: 18.10.2026
+#
+# This file provides regression tests of the StreamClassifier
+#
+# Usage: python -m unittest discover tests   (from the root of the project)
+
+import io
+import threading
+import unittest
+import numpy as np
+from src.MachineLearning import NeuralNetwork
+from src.StreamClassifier import StreamClassifier
+from test_Parser import createLine
+
+def createNetwork():
+    neuralNetwork = NeuralNetwork()
+    neuralNetwork.scaler.fit(np.ones((1, 9)))
+    return neuralNetwork
+
+class StreamClassifierTest(unittest.TestCase):
+    def testResults(self):
+        source = io.StringIO(createLine() + "\n" + createLine("slowWalk") + "\n")
+        streamClassifier = StreamClassifier(createNetwork(), source, batchSize=8)
+        streamClassifier.start()
+
+        results = list(streamClassifier.iterResults())
+        self.assertEqual(sum(len(labels) for (labels, outputs) in results), 2)
+
+    def testFailingBatchEndsStream(self):
+        # a failing batch must neither stop the classifier nor block iterResults()
+        neuralNetwork = createNetwork()
+        predictBatch = neuralNetwork.predictBatch
+        calls = []
+
+        def failFirstBatch(X):
+            calls.append(len(X))
+            if len(calls) == 1:
+                raise MemoryError("prediction failed")
+            return predictBatch(X)
+
+        neuralNetwork.predictBatch = failFirstBatch
+        source = io.StringIO(createLine() + "\n" + createLine("slowWalk") + "\n")
+        streamClassifier = StreamClassifier(neuralNetwork, source, batchSize=1, maxLatency=0)
+        streamClassifier.start()
+
+        # collected in a thread, so a regression fails instead of blocking the tests
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(streamClassifier.iterResults()), daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(streamClassifier.classifierThread.is_alive())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(results), 1)
+
+if __name__ == "__main__":
+    unittest.main()